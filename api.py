@@ -1,24 +1,272 @@
 """Module for connection to UserSide"""
-from requests import get
-from urllib3 import disable_warnings
-from urllib3.exceptions import InsecureRequestWarning
+from asyncio import Task, create_task, shield
+from json import loads
+
+from httpx import AsyncClient, Limits
+from urllib.parse import parse_qsl
+from cache import TTLCache
 from config import API_URL as api
+try:
+    from config import TEMPORARY_LINK_LIFETIME
+except ImportError:
+    TEMPORARY_LINK_LIFETIME = 3600 # seconds UserSide temporary attachment link is valid
+
+POOL_MAXSIZE = 32 # max keep-alive connections
+IDLE_TIMEOUT = 60 # seconds without requests before idle connection is dropped
+MAX_CONNECTIONS = 100 # max simultaneous connections
+
+# actions that change data in UserSide, never coalesced or cached
+WRITE_ACTIONS = {
+    ('task', 'add'),
+    ('task', 'comment_add'),
+    ('task', 'change_state'),
+    ('additional_data', 'change_value'),
+    ('customer', 'mark_add')
+}
+READ_ACTION_PREFIXES = ('get', 'show', 'check')
+
+CACHE_MAXSIZE = 5000 # max cached responses
+TEMPORARY_LINK_MARGIN = 300 # stop serving cached link this many seconds before it expires
+# (category, action) -> (ttl, stale period) in seconds. Actions not listed here are not cached
+CACHE_POLICIES = {
+    ('address', 'get_house'): (3600, 86400),
+    ('inventory', 'get_inventory_catalog'): (3600, 86400),
+    ('employee', 'get_data'): (600, 3600),
+    ('commutation', 'get_data'): (300, 3600),
+    ('device', 'get_ont_data'): (60, 300),
+    ('attach', 'get'): (60, 600),
+    ('attach', 'get_file_temporary_link'): (TEMPORARY_LINK_LIFETIME - TEMPORARY_LINK_MARGIN, 0), # expired link is useless
+    ('task', 'show'): (30, 300),
+    ('task', 'get_comment'): (30, 300),
+    ('task', 'get_list'): (15, 60),
+    ('customer', 'get_data'): (10, 60)
+}
+# write (category, action) -> cached entries it makes outdated:
+# (category, action, write param, cached param). Param None means all entries of this action
+CACHE_INVALIDATION = {
+    ('task', 'add'): [
+        ('task', 'get_list', None, None)
+    ],
+    ('task', 'comment_add'): [
+        ('task', 'show', 'id', 'id'),
+        ('task', 'get_comment', 'id', 'id'),
+        ('task', 'get_comment', 'id', 'task_id')
+    ],
+    ('task', 'change_state'): [
+        ('task', 'show', 'id', 'id'),
+        ('task', 'get_list', None, None)
+    ],
+    ('additional_data', 'change_value'): [
+        ('task', 'show', 'object_id', 'id')
+    ],
+    ('customer', 'mark_add'): [
+        ('customer', 'get_data', 'customer_id', 'id'),
+        ('commutation', 'get_data', 'customer_id', 'object_id')
+    ]
+}
+
+
+class UserSideClient:
+    """Process-wide async HTTP client with keep-alive connection pool
+
+    Connections are reused between calls instead of doing TCP+TLS handshake for each request.
+    Connections idle for `idle_timeout` seconds are dropped (UserSide closes them anyway).
+    New connections are counted from httpcore trace events, so stats show real reuse.
+    """
+    def __init__(
+        self,
+        pool_maxsize: int = POOL_MAXSIZE,
+        idle_timeout: float = IDLE_TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS
+    ):
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+
+        self._client: AsyncClient | None = None
+        self._requests = 0
+        self._connections = 0
 
-disable_warnings(InsecureRequestWarning)
+    async def _trace(self, event: str, info: dict):
+        if event == 'connection.connect_tcp.complete':
+            self._connections += 1
+
+    async def aget(self, url: str, timeout: float = 15) -> bytes:
+        """Async GET request to UserSide, returns raw response body
+
+        Raises:
+            httpx.HTTPStatusError: if response status is not 2xx
+        """
+        if self._client is None:
+            self._client = AsyncClient(
+                verify=False,
+                limits=Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.pool_maxsize,
+                    keepalive_expiry=self.idle_timeout
+                )
+            )
+        self._requests += 1
+        response = await self._client.get(url, timeout=timeout, extensions={'trace': self._trace})
+        response.raise_for_status()
+        return response.content
+
+    def stats(self) -> dict:
+        """Pool statistics. Hit - request used already opened connection, miss - new connection"""
+        return {
+            'requests': self._requests,
+            'hits': max(self._requests - self._connections, 0),
+            'misses': self._connections,
+            'pool_maxsize': self.pool_maxsize,
+            'max_connections': self.max_connections
+        }
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one
+
+    While a call with some key is in flight, other calls with the same key wait for its result
+    instead of doing their own request. Call runs in separate task, so cancelled caller does not
+    cancel it for others.
+    """
+    def __init__(self):
+        self._inflight: dict[tuple, Task] = {}
+        self.calls = 0
+        self.saved = 0
 
-def api_call(cat: str, action: str, data: str = '', timeout=15) -> dict:
-    """Base UserSide API call
+    async def do(self, key: tuple, func):
+        """Run `func` coroutine function or join already running call with same key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = create_task(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._done(key))
+            self.calls += 1
+        else:
+            self.saved += 1
+        return await shield(task)
+
+    def _done(self, key: tuple):
+        task = self._inflight.pop(key)
+        if not task.cancelled():
+            task.exception() # mark as retrieved if nobody is waiting
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'saved': self.saved,
+            'in_flight': len(self._inflight)
+        }
+
+
+client = UserSideClient()
+coalescer = SingleFlight()
+cache = TTLCache(CACHE_MAXSIZE)
+_refreshing: set[Task] = set() # keep references to background refresh tasks
+
+
+def is_read_action(cat: str, action: str) -> bool:
+    """Check if UserSide action only reads data"""
+    return (cat, action) not in WRITE_ACTIONS and action.startswith(READ_ACTION_PREFIXES)
+
+def request_key(cat: str, action: str, data: str = '') -> tuple:
+    """Build key of UserSide request. Params order does not matter"""
+    return cat, action, tuple(sorted(parse_qsl(data, keep_blank_values=True)))
+
+def invalidate_cache(cat: str, action: str, data: str = '') -> int:
+    """Drop cached responses made outdated by write call. Returns dropped count"""
+    rules = CACHE_INVALIDATION.get((cat, action))
+    if not rules:
+        return 0
+    params = dict(parse_qsl(data, keep_blank_values=True))
+
+    def _outdated(key: tuple) -> bool:
+        for rule_cat, rule_action, write_param, cached_param in rules:
+            if key[:2] != (rule_cat, rule_action):
+                continue
+            if write_param is None:
+                return True
+            if write_param not in params:
+                continue
+            for name, value in key[2]:
+                # cached request can ask for several ids at once (id=1,2,3)
+                if name == cached_param and params[write_param] in value.split(','):
+                    return True
+        return False
+    return cache.invalidate(_outdated)
+
+def _is_cacheable(body: bytes) -> bool:
+    """Check that UserSide response is valid JSON and not an error"""
+    try:
+        result = loads(body)
+    except ValueError:
+        return False
+    return not (isinstance(result, dict) and result.get('result') == 'ERROR')
+
+async def _fetch(url: str, key: tuple, timeout: float) -> bytes:
+    """Request UserSide (coalesced) and store result in cache if action and response are cacheable"""
+    policy = CACHE_POLICIES.get(key[:2])
+    if not policy:
+        return await coalescer.do(key, lambda: client.aget(url, timeout=timeout))
+    generation = cache.begin_fetch(key)
+    try:
+        body = await coalescer.do(key, lambda: client.aget(url, timeout=timeout))
+    finally:
+        outdated = cache.end_fetch(key) != generation # key was invalidated while fetching
+    if not outdated and _is_cacheable(body):
+        cache.set(key, body, *policy)
+    return body
+
+def _refresh(url: str, key: tuple, timeout: float):
+    """Refresh stale cache entry in background"""
+    async def _run():
+        try:
+            await _fetch(url, key, timeout)
+        except Exception as e:
+            print(f'error refresh cache: {e.__class__.__name__}: {e}')
+    task = create_task(_run())
+    _refreshing.add(task)
+    task.add_done_callback(_refreshing.discard)
+
+
+async def api_call_async(cat: str, action: str, data: str = '', timeout=15, use_cache=True) -> dict:
+    """Base UserSide API call (async)
 
     Args:
         cat (str): category
         action (str): action
         data (str, optional): query parameters separated with &. Defaults to ''.
+        use_cache (bool, optional): return cached result if available. Defaults to True.
 
     Returns:
         dict: API result
-    TODO: provide data using query params instead of one string
+
+    Identical read calls made at the same time share one request (see `SingleFlight`).
+    Reads listed in `CACHE_POLICIES` are cached; stale entry is returned immediately and refreshed
+    in background. Write calls drop cached entries they touch (`CACHE_INVALIDATION`).
+    Each caller gets its own parsed copy of result.
     """
-    return get(f'{api}{cat}&action={action}&{data}', verify=False, timeout=timeout).json()
+    url = f'{api}{cat}&action={action}&{data}'
+    if not is_read_action(cat, action):
+        result = loads(await client.aget(url, timeout=timeout))
+        invalidate_cache(cat, action, data)
+        return result
+
+    key = request_key(cat, action, data)
+    if use_cache and (cat, action) in CACHE_POLICIES:
+        cached = cache.get(key)
+        if cached is not None:
+            body, fresh = cached
+            if not fresh:
+                _refresh(url, key, timeout)
+            return loads(body)
+    return loads(await _fetch(url, key, timeout))
 
 # experimental query params
 # def api_call(cat: str, action: str, timeout=15, **params: dict[str, str | int | float]) -> dict:
@@ -35,7 +283,7 @@ def api_call(cat: str, action: str, data: str = '', timeout=15) -> dict:
 #     api_params = '&'.join([f'{key}={value}' for key, value in zip(params.keys(), params.values())])
 #     return get(f'{api}{cat}&action={action}&{api_params}', verify=False, timeout=timeout).json()
 
-def set_additional_data(category, field, id , value):
-    """Set additional data value"""
-    api_call('additional_data', 'change_value', f'cat_id={category}&field_id={field}&object_id=\
-{id}&value={value}')
+async def set_additional_data_async(category, field, id , value):
+    """Set additional data value (async)"""
+    await api_call_async('additional_data', 'change_value', f'cat_id={category}&field_id={field}&\
+object_id={id}&value={value}')
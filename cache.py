@@ -0,0 +1,106 @@
+"""Small in-memory caches"""
+from collections import OrderedDict
+from time import monotonic
+
+
+class TTLCache:
+    """Bounded LRU cache with per-entry TTL and stale period
+
+    Entry is fresh for `ttl` seconds after set, then stale for `stale` more seconds (can be served
+    while it is being refreshed), then expired.
+
+    Keys being fetched are registered with `begin_fetch`, so invalidation of such key is seen by
+    `end_fetch` and value fetched before it is not stored. Other keys are not affected.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict() # key -> (value, fresh until, stale until)
+        self._fetching: dict = {} # key being fetched -> (fetches in progress, invalidations since first)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key) -> tuple[object, bool] | None:
+        """Get value and its freshness. None if there is no usable value"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, fresh_until, stale_until = entry
+        now = monotonic()
+        if now > stale_until:
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if now > fresh_until:
+            self.stale_hits += 1
+            return value, False
+        self.hits += 1
+        return value, True
+
+    def set(self, key, value, ttl: float, stale: float = 0):
+        """Store value for `ttl` seconds (+ `stale` seconds as stale)"""
+        now = monotonic()
+        self._data[key] = (value, now + ttl, now + ttl + stale)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def begin_fetch(self, key) -> int:
+        """Register fetch of key value, returns generation to compare with `end_fetch` result"""
+        fetches, generation = self._fetching.get(key, (0, 0))
+        self._fetching[key] = fetches + 1, generation
+        return generation
+
+    def end_fetch(self, key) -> int:
+        """Unregister fetch of key value, returns generation. It differs from `begin_fetch` result
+        if key was invalidated in between"""
+        fetches, generation = self._fetching.pop(key)
+        if fetches > 1:
+            self._fetching[key] = fetches - 1, generation
+        return generation
+
+    def _outdate(self, key):
+        if key in self._fetching:
+            fetches, generation = self._fetching[key]
+            self._fetching[key] = fetches, generation + 1
+
+    def delete(self, key):
+        """Remove entry"""
+        if self._data.pop(key, None) is not None:
+            self.invalidations += 1
+        self._outdate(key)
+
+    def invalidate(self, predicate) -> int:
+        """Remove all entries whose key matches predicate, return removed count"""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        self.invalidations += len(keys)
+        for key in [key for key in self._fetching if predicate(key)]:
+            self._outdate(key)
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries"""
+        self._data.clear()
+        for key in list(self._fetching):
+            self._outdate(key)
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
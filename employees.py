@@ -0,0 +1,62 @@
+"""In-memory employee directory"""
+from asyncio import sleep
+from time import time
+
+from api import api_call_async
+from utils import list_to_str
+
+REFRESH_INTERVAL = 1800 # seconds between full directory reloads
+
+
+class EmployeeDirectory:
+    """Employee id -> name lookup
+
+    Whole directory is loaded with one `employee get_data` call and reloaded every
+    `refresh_interval` seconds. Unknown ids are fetched from UserSide on demand.
+    """
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.loaded_at: float | None = None
+        self._names: dict[int, str] = {}
+        self._missing: set[int] = set() # ids not found in UserSide since last reload
+
+    async def load(self):
+        """Load all employees"""
+        data = (await api_call_async('employee', 'get_data', use_cache=False)).get('data')
+        if not isinstance(data, dict):
+            raise ValueError('employee list is empty')
+        self._names = {int(id): employee['name'] for id, employee in data.items()}
+        self._missing = set()
+        self.loaded_at = time()
+
+    async def run(self):
+        """Reload directory forever (run as background task)"""
+        while True:
+            await sleep(self.refresh_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                print(f'error load employees: {e.__class__.__name__}: {e}')
+
+    async def get_name(self, id: int) -> str | None:
+        """Get employee name by id"""
+        return (await self.get_names([id])).get(id)
+
+    async def get_names(self, ids) -> dict[int, str | None]:
+        """Get names of several employees. Unknown ids are fetched with one UserSide call"""
+        ids = {int(id) for id in ids}
+        unknown = [id for id in ids if id not in self._names and id not in self._missing]
+        if unknown:
+            data = (await api_call_async('employee', 'get_data', f'id={list_to_str(unknown)}')).get('data')
+            if isinstance(data, dict):
+                for id, employee in data.items():
+                    self._names[int(id)] = employee['name']
+            self._missing.update(id for id in unknown if id not in self._names)
+        return {id: self._names.get(id) for id in ids}
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._names),
+            'missing': len(self._missing),
+            'loaded_at': self.loaded_at
+        }
@@ -1,4 +1,5 @@
-from html import unescape
+from asyncio import CancelledError, create_task
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.responses import FileResponse, JSONResponse
@@ -14,50 +15,47 @@ from routers import ont
 from routers import task
 from routers import attach
 from routers import inventory
-from api import api_call
+from routers import stats
+from api import client
+from ont import pool, pinger
+from employees import EmployeeDirectory
+from ont_state import OntStateStore, POLL_INTERVAL
+from reference import ReferenceData
 from config import API_KEY as APIKEY
+try:
+    from config import ONT_POLL_INTERVAL
+except ImportError:
+    ONT_POLL_INTERVAL = None # background ONT polling is off
 
-app = FastAPI(title='SmartLinkAPI')
 
-app.state.tariffs = {
-    tariff['billing_uuid']: unescape(tariff['name'])
-    for tariff in api_call('tariff', 'get')['data'].values()
-}
-app.state.customer_groups = {
-    group['id']: group['name']
-    for group in api_call('customer', 'get_customer_group')['data'].values()
-}
-app.state.addatas = {
-    str(data['id']): unescape(data['available_value'][0]).split('\n')
-    for data in api_call('additional_data', 'get_list', 'section=17')['data'].values()
-    if 'available_value' in data
-}
-app.state.tmc_categories = [
-    {
-        'id': section['id'],
-        'name': section['name'],
-        'type_id': section['type_id'],
-        'parent_id': section['parent_id'] if section['parent_id'] != 0 else None
-    } for section in api_call('inventory', 'get_inventory_section_catalog')['data'].values()
-]
-app.state.olts = [
-    {
-        'id': olt['id'],
-        'device': olt['name'],
-        'host': olt['host'],
-        'online': bool(olt['is_online']),
-        'location': unescape(olt['location'])
-    } for olt in api_call('device', 'get_data', 'object_type=olt&is_hide_ifaces_data=1')['data']
-        .values()
-]
-app.state.divisions = [
-    {
-        'id': division['id'],
-        'parent_id': division['parent_id'],
-        'name': unescape(division['name'])
-    } for division in api_call('employee', 'get_division_list')['data'].values()
-]
-app.state.cached_employees = []
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App startup/shutdown hook"""
+    reference = app.state.reference
+    if not reference.load_snapshot() and not await reference.reload_all(): # first start: wait for UserSide
+        raise RuntimeError('reference data is not loaded: UserSide is unavailable and there is no snapshot')
+    tasks = [create_task(reference.run())] # snapshot datasets are reloaded at once
+    try:
+        await app.state.employees.load()
+    except Exception as e:
+        print(f'error load employees: {e.__class__.__name__}: {e}') # names will be fetched on demand
+    tasks.append(create_task(app.state.employees.run()))
+    if ONT_POLL_INTERVAL:
+        tasks.append(create_task(app.state.ont_states.run(lambda: reference['olts'])))
+    yield
+    for background in tasks:
+        background.cancel()
+        with suppress(CancelledError):
+            await background
+    await client.aclose()
+    pool.close()
+    pinger.shutdown(cancel_futures=True)
+
+app = FastAPI(title='SmartLinkAPI', lifespan=lifespan)
+
+app.state.reference = ReferenceData()
+app.state.employees = EmployeeDirectory()
+app.state.ont_states = OntStateStore(ONT_POLL_INTERVAL or POLL_INTERVAL)
 app.state.cached_customers = []
 
 app.add_middleware(
@@ -77,6 +75,7 @@ app.include_router(neomobile.router)
 app.include_router(ont.router)
 app.include_router(task.router)
 app.include_router(inventory.router)
+app.include_router(stats.router)
 
 
 @app.middleware('http')
@@ -0,0 +1,158 @@
+"""Per-host admission of OLT work, so callers wait for OLT in event loop instead of worker threads"""
+from asyncio import Future, Lock, Task, create_task, get_running_loop, shield, wait_for
+from collections.abc import AsyncIterator, Callable
+from heapq import heappush, heappop, heapify
+from itertools import count
+from time import monotonic
+
+from starlette.concurrency import run_in_threadpool
+
+from ont import SESSIONS_PER_HOST, CHECKOUT_TIMEOUT, PRIORITY_INTERACTIVE, PRIORITY_BULK, PON_PORTS, \
+    CONNECTION_ERRORS, fetch_pon_slots, fetch_port_summary
+
+MAX_QUEUED = 20 # max operations waiting for one OLT, more are rejected at once
+
+
+class OltBusyError(Exception):
+    """Too many operations are waiting for OLT, or operation waited too long"""
+
+
+class OltScheduler:
+    """Per-host queue of OLT operations in front of `ont.pool`
+
+    Not more than `slots` operations of every host run in worker threads (as many as pool sessions, so
+    they never wait for session there); others wait here ordered by priority, then by arrival. Waiting
+    costs no thread, and if `max_queued` operations are already waiting, new one fails at once.
+    Slot is freed when thread is done, even if caller is cancelled (client disconnected) before that.
+    """
+    def __init__(self, slots: int = SESSIONS_PER_HOST, max_queued: int = MAX_QUEUED, timeout: float = CHECKOUT_TIMEOUT):
+        self.slots = slots
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._running: dict[str, int] = {}
+        self._queues: dict[str, list[tuple[int, int, Future]]] = {} # host -> heap of (priority, ticket, waiter)
+        self._tickets = count()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._write_locks: dict[tuple, tuple[Lock, int]] = {} # ONT key -> (lock, holders and waiters)
+
+    async def run(self, host: str, func: Callable, *args, priority: int = PRIORITY_INTERACTIVE):
+        """Run func(*args) in worker thread when host slot is free
+
+        Raises:
+            OltBusyError: if queue of host is full or slot is not free in `timeout`
+        """
+        await self._acquire(host, priority)
+        work = create_task(run_in_threadpool(func, *args))
+
+        def done(work: Task):
+            self._release(host)
+            if not work.cancelled():
+                work.exception() # caller may be gone, so error is not reported as never retrieved
+
+        work.add_done_callback(done)
+        return await shield(work)
+
+    async def run_write(self, host: str, key: tuple, func: Callable, *args):
+        """Run ONT write like `run`, writes with same key are admitted one by one in arrival order
+
+        Order is taken here, not in worker thread, so writes admitted together can't swap. If caller is
+        cancelled while its write still runs, next write waits for it in `ont.ont_writes` lock.
+        """
+        lock, users = self._write_locks.get(key, (None, 0))
+        lock = lock or Lock() # asyncio.Lock wakes waiters in arrival order
+        self._write_locks[key] = lock, users + 1
+        try:
+            async with lock:
+                return await self.run(host, func, *args)
+        finally:
+            lock, users = self._write_locks[key]
+            if users == 1:
+                del self._write_locks[key]
+            else:
+                self._write_locks[key] = lock, users - 1
+
+    async def _acquire(self, host: str, priority: int):
+        stats = self._stats.setdefault(host, {'runs': 0, 'waits': 0, 'rejected': 0, 'timeouts': 0, 'max_wait': 0})
+        queue = self._queues.setdefault(host, [])
+        stats['runs'] += 1
+        if not queue and self._running.get(host, 0) < self.slots:
+            self._running[host] = self._running.get(host, 0) + 1
+            return
+        if len(queue) >= self.max_queued:
+            stats['rejected'] += 1
+            raise OltBusyError(f'too many requests to {host}, try later')
+
+        waiter = get_running_loop().create_future()
+        entry = (priority, next(self._tickets), waiter)
+        heappush(queue, entry)
+        started = monotonic()
+        try:
+            await wait_for(waiter, self.timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled(): # slot was given right before timeout/cancel
+                self._release(host)
+            elif entry in queue:
+                queue.remove(entry)
+                heapify(queue)
+            if isinstance(e, TimeoutError):
+                stats['timeouts'] += 1
+                raise OltBusyError(f'{host} is busy, no free session in {self.timeout} seconds') from None
+            raise
+        finally:
+            stats['waits'] += 1
+            stats['max_wait'] = max(stats['max_wait'], monotonic() - started)
+
+    def _release(self, host: str):
+        """Give slot to next waiter of host, or free it"""
+        queue = self._queues[host]
+        while queue:
+            waiter = heappop(queue)[2]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._running[host] -= 1
+
+    def stats(self) -> dict:
+        return {
+            host: {'running': self._running.get(host, 0), 'queued': len(self._queues.get(host, [])), **stats}
+            for host, stats in self._stats.items()
+        }
+
+
+scheduler = OltScheduler()
+
+async def sweep_ont_summary(host: str, frame: int = 0, slots: list[int] | None = None,
+                            ports: int = PON_PORTS) -> AsyncIterator[dict]:
+    """Get summary of every PON port of OLT, port by port
+
+    PON boards are found with `display board` if slots are not given. Ports of board are swept until
+    first missing one. Every port is a separate bulk operation, so single ONT requests still get in
+    between ports. Sweep stops at first connection error or busy OLT: other ports would fail the same
+    way after the same timeouts.
+    Yields:
+        get_ont_summary result with 'interface' for every port (fail one is last if sweep is stopped),
+        or single fail result if boards can't be read
+    """
+    if slots is None:
+        try:
+            slots = await scheduler.run(host, fetch_pon_slots, host, frame, priority=PRIORITY_BULK)
+        except Exception as e:
+            print(f'error sweep ont: {e.__class__.__name__}: {e}')
+            yield {'status': 'fail', 'detail': str(e)}
+            return
+
+    for slot in slots:
+        for port in range(ports):
+            interface = {'name': f'{frame}/{slot}/{port}', 'fibre': frame, 'service': slot, 'port': port}
+            try:
+                result = await scheduler.run(host, fetch_port_summary, host, interface, priority=PRIORITY_BULK)
+            except (*CONNECTION_ERRORS, OltBusyError) as e:
+                print(f'error sweep ont: {e.__class__.__name__}: {e}')
+                yield {'interface': interface, 'status': 'fail', 'detail': str(e)}
+                return
+            except Exception as e:
+                print(f'error sweep ont: {e.__class__.__name__}: {e}')
+                result = {'status': 'fail', 'detail': str(e)}
+            if result.get('detail') == 'port does not exist':
+                break
+            yield {'interface': interface, **result}
@@ -1,132 +1,384 @@
 """Module for actions with SSH OLT"""
-from time import sleep, time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from heapq import heappush, heapify
+from itertools import count
+from threading import Condition, Thread
+from time import sleep, monotonic
 from select import select
-from subprocess import run
-from re import search, fullmatch, split
+from re import fullmatch, compile, escape, MULTILINE
 
-from paramiko import SSHClient, AutoAddPolicy, Channel
+from paramiko import SSHClient, AutoAddPolicy, Channel, SSHException
 
 from config import SSH_USER, SSH_PASSWORD
 from utils import format_mac
+from ping import ping
 
 CONNECT_TIMEOUT = 5
 AUTH_TIMEOUT = 5
 BANNER_TIMEOUT = 3
+READ_TIMEOUT = 20 # max time (s) to wait for prompt after command
+SCROLL_LINES = 512 # lines per screen before "---- More" (max for Huawei), batched commands must fit in it
+
+SESSIONS_PER_HOST = 2 # Huawei OLT accepts only few simultaneous VTY sessions
+SESSION_IDLE_TIMEOUT = 120 # close pooled session unused for this time (s), OLT drops it itself later
+CHECKOUT_TIMEOUT = 30 # max wait for free session (s)
+PRIORITY_INTERACTIVE = 0 # single ONT diagnosis and writes, served first
+PRIORITY_BULK = 1 # port summaries and other sweeps
+PING_WORKERS = 8 # max ONT pings running alongside SSH diagnoses
+PON_PORTS = 16 # max ports of GPON board, sweep of board stops at first missing port
+CONNECTION_ERRORS = (SSHException, OSError, EOFError) # OLT is unreachable or session is broken (TimeoutError is OSError)
 
 PAGINATION = "---- More ( Press 'Q' to break ) ----"
-PAGINATION_WITH_SPACES = "---- More ( Press 'Q' to break ) ----\x1b[37D                                   \x1b[37D  "
-DIVIDER = '-' * 78
-# RE_ONT_SUMMARY_DATA1 = r'^(\d*)\s*(online|offline)\s*((?:\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})|-)\s*((?:\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})|-)\s*(.*?)(?:\s*)$'
-# RE_ONT_SUMMARY_DATA2 = r'^(\d*)\s*([A-Z0-9]+)\s*([A-Z0-9\-]+)\s*(-|\d*)\s*([0-9\-.]+)\/([0-9\-.]+).*$'
+RE_PROMPT = compile(r'(?:^|\n)([\w\-.]+(?:\([\w\-/]+\))?[#>])[ \t]*$') # "JBI-Grand(config-if-gpon-0/2)#"
+RE_CONTINUATION = compile(r'\{ ?<cr>\|[^}]*\}:[ \t]*$') # "{ <cr>|autosense<K>|e2e<K>|ont<K>|sort-by<K> }:"
+RE_QUESTION = compile(rf'\{{ ?<cr>\|[^}}]*\}}:|{escape(PAGINATION)}') # continuation or pagination anywhere in output
+RE_VALUE_SUFFIX = compile(r'\+06:00|%|\(\w*\)$')
+RE_FLOAT = compile(r'[+-]?\d+[.,]\d+')
+RE_INT = compile(r'[+-]?\d+')
+RE_SPACE = compile(r'\s')
+RE_WORD = compile(r'\w')
+TRUE_VALUES = frozenset(('online', 'enable', 'support', 'concern', 'on', 'up'))
+FALSE_VALUES = frozenset(('offline', 'disable', 'not support', 'unconcern', 'off', 'down'))
+RE_CONFIRM = compile(r'\(y/n\)(?:\[\w\])?:[ \t]*$') # "Are you sure to reset the ONT(s)? (y/n)[n]:"
+RE_ONT_SUMMARY_TOTAL = compile(r'In port (\d+/\d+/\d+), the total of ONTs are: (\d+), online: (\d+)')
+RE_ONT_SUMMARY_DATA1 = compile(r'(\d+)\s+(online|offline)\s+((?:\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})|-)\s+((?:\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})|-)\s*(.*?)') # id, state, last up, last down, cause
+RE_ONT_SUMMARY_DATA2 = compile(r'(\d+)\s+([A-Z0-9]+)\s+([A-Z0-9\-]+)\s+(-|\d+)\s+([0-9\-.]+)/([0-9\-.]+)\s*(.*?)') # id, sn, type, distance, rx/tx, description
+MAC_HEADING = {'MAC TYPE': 'MAC-TYPE'} # avoid extra spaces for better parsing (prefer "-")
+RE_PON_BOARD = compile(r'^\s*(\d+)\s+(H\d{3}(?:GP|XG|CG|XS)\w*)\s+(\w+)', MULTILINE) # slot, board name, status ("0  H901GPHF  Normal")
 
 # sequence: fibre -> service -> port -> ont
 
-def _connect_ssh(host: str) -> tuple[Channel, SSHClient, str]:
-    """Connect to SSH client using paramiko"""
+def _connect_ssh(host: str, olt_name: str | None = None) -> tuple[Channel, SSHClient, str]:
+    """Connect to SSH client using paramiko. OLT name is parsed from prompt if not provided
+
+    Host may include port ("127.0.0.1:2222"), default is 22.
+    """
+    hostname, _, port = host.partition(':')
     ssh = SSHClient()
     ssh.set_missing_host_key_policy(AutoAddPolicy())
-    ssh.connect(host, username=SSH_USER, password=SSH_PASSWORD, timeout=CONNECT_TIMEOUT,
+    ssh.connect(hostname, port=int(port or 22), username=SSH_USER, password=SSH_PASSWORD, timeout=CONNECT_TIMEOUT,
         auth_timeout=AUTH_TIMEOUT, banner_timeout=BANNER_TIMEOUT, look_for_keys=False,
         allow_agent=False)
 
     channel = ssh.invoke_shell()
-    sleep(0.2)
-    _clear_buffer(channel)
+    _read_output(channel) # banner
 
     channel.send(b"enable\n")
-    sleep(0.07)
-    olt_name = _read_output(channel, False).splitlines()[-1].strip().rstrip('#')
-    _clear_buffer(channel)
+    output = _read_output(channel)
+    if olt_name is None:
+        olt_name = output.splitlines()[-1].strip().rstrip('#')
+
+    channel.send(bytes(f"scroll {SCROLL_LINES}\n", 'utf-8'))
+    _read_output(channel)
 
     channel.send(b"config\n")
-    sleep(0.07)
-    _clear_buffer(channel)
+    _read_output(channel)
     return channel, ssh, olt_name
 
+
+class OutputDesyncError(Exception):
+    """Command output does not match sent commands, shell state is unknown"""
+
+
+class OltSession:
+    """Authenticated OLT shell session in config mode"""
+    def __init__(self, host: str, olt_name: str | None = None):
+        self.host = host
+        self.channel, self.ssh, self.olt_name = _connect_ssh(host, olt_name)
+        self.created_at = monotonic()
+        self.last_used = monotonic()
+        self.uses = 0
+
+    def is_alive(self) -> bool:
+        """Check that SSH connection and shell channel are still open"""
+        transport = self.ssh.get_transport()
+        return transport is not None and transport.is_active() and not self.channel.closed and \
+            not self.channel.exit_status_ready()
+
+    def close(self):
+        try:
+            self.channel.close()
+            self.ssh.close()
+        except Exception as e:
+            print(f'error close ssh: {e.__class__.__name__}: {e}')
+
+
+class SessionPool:
+    """Pool of ready-to-use OLT sessions
+
+    Sessions are kept open after use and given to the next request for the same host, so SSH
+    handshake, login and enable/config are done only once. Not more than `max_sessions` sessions
+    are opened for every host; others wait in per-host queue ordered by priority, then by arrival.
+    Requests are admitted by `olt_scheduler` before they take a worker thread, so they rarely wait here.
+    """
+    def __init__(
+        self,
+        max_sessions: int = SESSIONS_PER_HOST,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        checkout_timeout: float = CHECKOUT_TIMEOUT
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.olt_names: dict[str, str] = {} # host -> OLT name from prompt
+        self._cond = Condition()
+        self._idle: dict[str, list[OltSession]] = {}
+        self._opened: dict[str, int] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+        self._queues: dict[str, list[tuple[int, int]]] = {} # host -> heap of waiting (priority, ticket)
+        self._tickets = count()
+        self._reaper: Thread | None = None
+
+    def checkout(self, host: str, priority: int = PRIORITY_INTERACTIVE) -> OltSession:
+        """Take free session for host (open new one if limit is not reached)"""
+        with self._cond:
+            if self._reaper is None:
+                self._reaper = Thread(target=self._reap, daemon=True)
+                self._reaper.start()
+            stats = self._stats.setdefault(host, {
+                'connects': 0, 'reuses': 0, 'broken': 0, 'timeouts': 0, 'waits': 0, 'wait_time': 0, 'max_wait': 0
+            })
+            queue = self._queues.setdefault(host, [])
+            ticket = (priority, next(self._tickets))
+            heappush(queue, ticket)
+            started = monotonic()
+            try:
+                while True:
+                    if queue[0] == ticket:
+                        idle = self._idle.setdefault(host, [])
+                        while idle:
+                            session = idle.pop()
+                            if session.is_alive():
+                                session.uses += 1
+                                stats['reuses'] += 1
+                                return session
+                            stats['broken'] += 1
+                            self._discard(session)
+                        if self._opened.get(host, 0) < self.max_sessions:
+                            self._opened[host] = self._opened.get(host, 0) + 1
+                            stats['connects'] += 1
+                            break
+                    if not self._cond.wait(started + self.checkout_timeout - monotonic()):
+                        stats['timeouts'] += 1
+                        raise TimeoutError(f'no free ssh session for {host}')
+            finally:
+                queue.remove(ticket)
+                heapify(queue)
+                waited = monotonic() - started
+                stats['waits'] += 1
+                stats['wait_time'] += waited
+                stats['max_wait'] = max(stats['max_wait'], waited)
+                self._cond.notify_all() # next in queue may take session
+
+        try:
+            session = OltSession(host, self.olt_names.get(host))
+        except BaseException:
+            with self._cond:
+                self._opened[host] -= 1
+                self._cond.notify_all()
+            raise
+        self.olt_names[host] = session.olt_name
+        session.uses += 1
+        return session
+
+    def checkin(self, session: OltSession, broken: bool = False):
+        """Return session to pool. Broken (or closed) session is closed and dropped"""
+        with self._cond:
+            if broken or not session.is_alive():
+                self._stats[session.host]['broken'] += 1
+                self._discard(session)
+            else:
+                session.last_used = monotonic()
+                self._idle.setdefault(session.host, []).append(session)
+            self._cond.notify_all()
+
+    def _discard(self, session: OltSession):
+        """Close session and free its slot (call with lock held)"""
+        session.close()
+        self._opened[session.host] -= 1
+
+    def _reap(self):
+        """Close sessions idle longer than idle timeout"""
+        while True:
+            sleep(min(self.idle_timeout, 30))
+            with self._cond:
+                for idle in self._idle.values():
+                    for session in [s for s in idle if monotonic() - s.last_used > self.idle_timeout]:
+                        idle.remove(session)
+                        self._discard(session)
+                self._cond.notify_all()
+
+    def run(self, host: str, func, priority: int = PRIORITY_INTERACTIVE, retry: bool = True):
+        """Run func(session) on pooled session
+
+        func must leave shell in config mode, even if it raises. Session is dropped only on connection
+        errors and output desync; if reused session turns out to be broken (OLT closed it), call is repeated once on new one.
+        Writes must pass retry=False: the broken session may have run the command already.
+        """
+        for attempt in range(2):
+            session = self.checkout(host, priority)
+            try:
+                result = func(session)
+            except (*CONNECTION_ERRORS, OutputDesyncError) as e:
+                self.checkin(session, broken=True)
+                if not retry or attempt or session.uses < 2 or isinstance(e, (TimeoutError, OutputDesyncError)): # command may have been run already
+                    raise
+                print(f'ssh session to {host} is broken, reconnecting')
+                continue
+            except Exception:
+                _clear_buffer(session.channel)
+                self.checkin(session)
+                raise
+            except BaseException:
+                self.checkin(session, broken=True)
+                raise
+            self.checkin(session)
+            return result
+
+    def close(self):
+        """Close all idle sessions"""
+        with self._cond:
+            for idle in self._idle.values():
+                while idle:
+                    self._discard(idle.pop())
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                host: {
+                    'opened': self._opened.get(host, 0),
+                    'idle': len(self._idle.get(host, [])),
+                    'queued': len(self._queues.get(host, [])),
+                    **stats,
+                    'avg_wait': stats['wait_time'] / stats['waits'] if stats['waits'] else 0
+                } for host, stats in self._stats.items()
+            }
+
+
+class OrderedLocks:
+    """Per-key locks given strictly in request order (threading.Lock does not guarantee it)"""
+    def __init__(self):
+        self._cond = Condition()
+        self._queues: dict[tuple, deque] = {}
+
+    @contextmanager
+    def hold(self, key: tuple):
+        """Hold lock for key in `with` block"""
+        ticket = object()
+        with self._cond:
+            queue = self._queues.setdefault(key, deque())
+            queue.append(ticket)
+            while queue[0] is not ticket:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                queue.popleft()
+                if not queue:
+                    del self._queues[key]
+                self._cond.notify_all()
+
+    def __len__(self) -> int:
+        """Count of keys with held lock"""
+        with self._cond:
+            return len(self._queues)
+
+
+pool = SessionPool()
+ont_writes = OrderedLocks() # ont_key() -> writes to ONT in arrival order
+pinger = ThreadPoolExecutor(PING_WORKERS, thread_name_prefix='ping')
+
 def search_ont(sn: str, host: str) -> tuple[dict, str | None] | None:
-    """Search ONT by serial number and return its basic, optical and catv data"""
-    ont_info: dict = {}
+    """Search ONT by serial number and return its basic, optical and catv data
+
+    ONT is pinged in background as soon as its IP is known, while the rest of commands run.
+    """
     olt_name = None
-    try:
-        channel, ssh, olt_name = _connect_ssh(host)
+    ping_result: Future | None = None
+
+    def search(session: OltSession) -> dict:
+        nonlocal olt_name, ping_result
+        channel = session.channel
+        olt_name = session.olt_name
 
         channel.send(bytes(f"display ont info by-sn {sn}\n", 'utf-8'))
         parsed_ont_info = _parse_basic_info(_read_output(channel))
 
         if 'error' in parsed_ont_info:
-            return {'status': 'offline', 'detail': parsed_ont_info['error']}, olt_name
+            return {'status': 'offline', 'detail': parsed_ont_info['error']}
         ont_info = parsed_ont_info
+        if ont_info.get('ip') and ping_result is None:
+            ping_result = pinger.submit(_ping, ont_info['ip'])
 
-        channel.send(bytes(f"interface gpon {ont_info['interface']['fibre']}/{ont_info['interface']['service']}\n", 'utf-8'))
-        sleep(0.07)
-        _clear_buffer(channel)
-
+        port, ont_id = ont_info['interface']['port'], ont_info['ont_id']
+        commands = {'interface': f"interface gpon {ont_info['interface']['fibre']}/{ont_info['interface']['service']}"}
         if ont_info.get('online'):
-            channel.send(bytes(f"display ont optical-info {ont_info['interface']['port']} {ont_info['ont_id']}\n", 'utf-8'))
-            optical_info = _parse_optical_info(_read_output(channel))
-            ont_info['optical'] = optical_info
-
-        catv_results = []
-        for port_num in range(1, (ont_info['_catv_ports'] or 2) + 1):
-            sleep(0.07)
-            channel.send(bytes(f"display ont port attribute {ont_info['interface']['port']} {ont_info['ont_id']} catv {port_num}\n", 'utf-8'))
-            catv = _parse_port_status(_read_output(channel))
-            catv_results.append(catv)
-
-        channel.send(bytes(f"display ont port state {ont_info['interface']['port']} {ont_info['ont_id']} eth-port all\n\n", 'utf-8'))
-        eth_results = _parse_eth_ports_status(_read_output(channel))
-
-        ont_info['catv'] = catv_results
-        ont_info['eth'] = eth_results
+            commands['optical'] = f'display ont optical-info {port} {ont_id}'
+        catv_ports = ont_info['_catv_ports'] or 2
+        for port_num in range(1, catv_ports + 1):
+            commands[f'catv {port_num}'] = f'display ont port attribute {port} {ont_id} catv {port_num}'
+        commands['eth'] = f'display ont port state {port} {ont_id} eth-port all' # asks "{ <cr>|eth-port<K>|... }:"
+        commands['quit'] = 'quit' # quit from interface
+        commands['service_port'] = f"display service-port port {ont_info['interface']['fibre']}/" \
+            f"{ont_info['interface']['service']}/{port} ont {ont_id}" # asks "{ <cr>|autosense<K>|... }:"
+        outputs = _run_batch(channel, commands, session.olt_name, frozenset(('eth', 'service_port')))
+
+        if 'optical' in outputs:
+            ont_info['optical'] = _parse_optical_info(outputs['optical'])
+        ont_info['catv'] = [_parse_port_status(outputs[f'catv {port_num}']) for port_num in range(1, catv_ports + 1)]
+        ont_info['eth'] = _parse_eth_ports_status(outputs['eth'])
         del ont_info['_catv_ports']
+        ont_info['service_port'] = _parse_service_port(outputs['service_port'], ont_info['interface'])
 
-        channel.send(b'quit\n') # quit from interface
-        sleep(0.07)
-        _clear_buffer(channel)
-
-        channel.send(bytes(
-            f"display service-port port "
-            f"{ont_info['interface']['fibre']}/{ont_info['interface']['service']}/{ont_info['interface']['port']} "
-            f"ont {ont_info['ont_id']}\n\n", 'utf-8' # extra \n for pass command ("{ <cr>|autosense<K>|e2e<K>|ont<K>|sort-by<K> }:")
-        ))
-        ont_info['service_port'] = _parse_service_port(_read_output(channel), ont_info['interface'])
         if ont_info['service_port']:
-            sleep(0.07)
             channel.send(bytes(f'display mac-address service-port {ont_info["service_port"]}\n', 'utf-8'))
-            ont_info['mac'] = _parse_mac(_read_output(channel))
+            row = _read_first_row(channel, MAC_HEADING) # ONT behind router may have many MACs, first one is used
+            ont_info['mac'] = format_mac(row.get('MAC')) if row else None
+        return ont_info
 
-        channel.close()
-        ssh.close()
+    try:
+        ont_info = pool.run(host, search)
+        if 'status' in ont_info:
+            return ont_info, olt_name # not found / offline
 
-        ping_result = _ping(ont_info['ip']) if 'ip' in ont_info else None
-        ont_info['ping'] = float(ping_result.split(' ', maxsplit=1)[0]) if ping_result else None
+        ping = ping_result.result() if ping_result is not None else None
+        ont_info['ping'] = float(ping.split(' ', maxsplit=1)[0]) if ping else None
         return ont_info, olt_name
     except Exception as e:
         print(f'error search ont: {e.__class__.__name__}: {e}')
         return {'online': False, 'detail': str(e)}, olt_name
 
 
+def ont_key(host: str, id: int, interface: dict) -> tuple:
+    """Key of ONT for write ordering"""
+    return host, interface['fibre'], interface['service'], interface['port'], id
+
 def reset_ont(host: str, id: int, interface: dict) -> dict:
     """Restart/reset ONT"""
-    try:
-        channel, ssh, _ = _connect_ssh(host)
-
+    def reset(session: OltSession) -> dict:
+        channel = session.channel
         channel.send(bytes(f"interface gpon {interface['fibre']}/{interface['service']}\n", 'utf-8'))
-        sleep(0.1)
-        _clear_buffer(channel)
-
-        channel.send(bytes(f"ont reset {interface['port']} {id}\n", 'utf-8'))
-        sleep(0.2)
-        channel.send(b'y\n') # confirmation
-        sleep(2)
-        out = _read_output(channel)
+        _read_output(channel)
+
+        try:
+            channel.send(bytes(f"ont reset {interface['port']} {id}\n", 'utf-8'))
+            out = _read_output(channel, confirm=True)
+        finally:
+            channel.send(b'quit\n') # quit from interface
+            _read_output(channel)
+
         if 'Failure:' in out:
             print(f'error reset ont: failure: {out.split("Failure:")[1]}')
             return {'status': 'fail', 'detail': out.split('Failure:')[1].split('\n')[0]}
-
-        channel.close()
-        ssh.close()
         return {'status': 'success', 'id': id}
+
+    try:
+        with ont_writes.hold(ont_key(host, id, interface)):
+            return pool.run(host, reset, retry=False)
     except Exception as e:
         print(f'error reset ont: {e.__class__.__name__}: {e}')
         return {'status': 'fail', 'detail': e}
@@ -134,44 +386,63 @@ def reset_ont(host: str, id: int, interface: dict) -> dict:
 
 def toggle_catv(host: str, id: int, catv_id: int, state: bool, interface: dict) -> tuple[dict, int]:
     """Toggle CATV port state"""
-    try:
-        channel, ssh, _ = _connect_ssh(host)
-
+    def toggle(session: OltSession) -> tuple[dict, int]:
+        channel = session.channel
         channel.send(bytes(f"interface gpon {interface['fibre']}/{interface['service']}\n", 'utf-8'))
-        sleep(0.1)
-        _clear_buffer(channel)
+        _read_output(channel)
+
+        try:
+            channel.send(bytes(f'ont port attribute {interface["port"]} {id} catv {catv_id} operational-state {"on" if state else "off"}\n', 'utf-8'))
+            output = _read_output(channel)
+        finally:
+            channel.send(b'quit\n') # quit from interface
+            _read_output(channel)
 
-        channel.send(bytes(f'ont port attribute {interface["port"]} {id} catv {catv_id} operational-state {"on" if state else "off"}\n', 'utf-8'))
-        output = _read_output(channel, False)
         if 'Failure: Make configuration repeatedly' in output:
             return {'status': 'fail', 'detail': 'CATV port is already in the requested state'}, 409
-
-        channel.close()
-        ssh.close()
         return {'status': 'success'}, 200
+
+    try:
+        with ont_writes.hold(ont_key(host, id, interface)):
+            return pool.run(host, toggle, retry=False)
     except Exception as e:
         print(f'error toggle catv: {e.__class__.__name__}: {e}')
         return {'status': 'fail', 'detail': e}, 500
 
+def _port_summary(session: OltSession, interface: dict) -> dict:
+    """Run `display ont info summary` for port in session, output is parsed as it is received"""
+    channel = session.channel
+    channel.send(bytes(f"display ont info summary {interface['fibre']}/{interface['service']}/{interface['port']}\n", 'utf-8'))
+    parser = OntSummaryParser()
+    _read_output(channel, parser=parser)
+    online, offline, onts = parser.result()
+    if isinstance(online, dict):
+        return online # error
+
+    return {
+        'status': 'success',
+        'online': online,
+        'offline': offline,
+        'onts': onts
+    }
+
+def _board_output(session: OltSession, frame: int) -> str:
+    """Run `display board` for frame in session"""
+    session.channel.send(bytes(f'display board {frame}\n', 'utf-8'))
+    return _read_output(session.channel)
+
+def fetch_pon_slots(host: str, frame: int = 0) -> list[int]:
+    """Get slots of working PON boards of frame (raises on connection errors)"""
+    return pool.run(host, lambda session: _parse_boards(_board_output(session, frame)), PRIORITY_BULK)
+
+def fetch_port_summary(host: str, interface: dict) -> dict:
+    """Get summary of port (raises on connection errors)"""
+    return pool.run(host, lambda session: _port_summary(session, interface), PRIORITY_BULK)
+
 def get_ont_summary(host: str, interface: dict) -> dict:
     """get all onts from port"""
     try:
-        channel, ssh, _ = _connect_ssh(host)
-
-        channel.send(bytes(f"display ont info summary {interface['fibre']}/{interface['service']}/{interface['port']}\n", 'utf-8'))
-        online, offline, onts = _parse_onts_info(_read_output((channel)))
-        if isinstance(online, dict):
-            return online # error
-
-        channel.close()
-        ssh.close()
-        return {
-            'status': 'success',
-            'online': online,
-            'offline': offline,
-            'onts': onts
-        }
-
+        return fetch_port_summary(host, interface)
     except Exception as e:
         print(f'error summary ont: {e.__class__.__name__}: {e}')
         return {'status': 'fail', 'detail': e}
@@ -181,152 +452,310 @@ def _clear_buffer(channel: Channel):
     if channel.recv_ready():
         channel.recv(32768)
 
-def _read_output(channel: Channel, force: bool = True):
-    """Read console output"""
-    output = ""
-    last_data_time = time()
-    start_time = time()
+def _read_output(
+    channel: Channel,
+    confirm: bool = False,
+    timeout: float = READ_TIMEOUT,
+    parser: 'OutputParser | OntSummaryParser | None' = None,
+    on_items: Callable[[list[tuple]], bool | None] | None = None
+) -> str:
+    """Read console output until prompt is back
+
+    Args:
+        channel: shell channel
+        confirm: answer "(y/n)" question with "y" (otherwise "n")
+        timeout: max time to wait for prompt
+        parser: feed output to this parser as it is received instead of returning it
+        on_items: called with items parsed from every chunk (OutputParser only); if it returns True,
+            rest of output is not parsed and rest of paginated output is skipped
+    Returns:
+        command output without first (echo) line ('' if parser is given)
+    """
+    chunks = []
+    tail = '' # end of output, enough to find prompt in it
+    echo = True # first line is not read completely yet
+    first_line = '' # echo, returned if output has no line break
+    stop = False
+    deadline = monotonic() + timeout
 
     while True:
-        ready, _, _ = select([channel], [], [], 0.05)
-        if ready:
-            data = channel.recv(32768).decode('utf-8', errors='ignore')
-            if data:
-                output += data
-                last_data_time = time()
-                # pagination
-                if PAGINATION in data:
-                    channel.send(b" ")
-                    continue
-
-                # command completed ("user#" input in data)
-                if output.strip().endswith('#') and (len(output.strip().strip('\n').splitlines()) > 5 or not force):
-                    print('command completed')
-                    break
-                sleep(0.05)
-
-        if time() - last_data_time > 1.5 and len(output.strip().strip('\n').splitlines()) > 5:
-            print('no new data more than 1.5 seconds')
-            break
-        if time() - last_data_time > 10 and len(output.strip().strip('\n').splitlines()) <= 5:
-            print('no new data more than 10 seconds')
-            print(output)
+        ready, _, _ = select([channel], [], [], max(deadline - monotonic(), 0))
+        if not ready:
+            raise TimeoutError(f'no prompt in {timeout} seconds: {tail[-80:]!r}')
+        data = channel.recv(32768)
+        if not data:
+            raise EOFError('ssh channel closed')
+        data = data.decode('utf-8', errors='ignore').replace('\r', '')
+        tail = (tail + data)[-256:]
+        if echo:
+            head, newline, data = data.partition('\n')
+            first_line += head
+            echo = not newline
+        if not echo and parser is None:
+            chunks.append(data)
+        elif not echo and not stop:
+            items = parser.feed(data)
+            if on_items and items:
+                stop = bool(on_items(items))
+
+        if RE_PROMPT.search(tail):
             break
-        if time() - start_time > 5 and not force:
-            print('read output takes more than 5 seconds')
-            break
-        if time() - start_time > 20:
-            print('read output takes more than 20 sceonds')
-            print(output)
-        sleep(0.01)
-    return '\n'.join(output.splitlines()[1:]) if output.count('\n') > 1 else output
-
-def _parse_output(raw: str) -> tuple[dict, list[list[dict]]]:
-    def _parse_value(value: str) -> str | float | int | bool | None:
-        value = value.strip().rstrip('/')
-        value = split(r"\+06:00|%|\(\w*\)$", value, maxsplit=1)[0] # remove "+06:00", "%", and units
-
-        if value == '-':
-            return None
-        if fullmatch(r'[+-]?\d+[.,]\d+', value):
-            return float(value.replace(',', '.'))
-        if fullmatch(r'[+-]?\d+', value):
-            return int(value)
-        if value.lower() in ('online', 'enable', 'support', 'concern', 'on', 'up'):
-            return True
-        if value.lower() in ('offline', 'disable', 'not support', 'unconcern', 'off', 'down'):
-            return False
-        return value
-
-    def _find_all(string: str, finding: str) -> list[int]:
-        result = []
-        for i, _ in enumerate(string):
-            if string[i:i + len(finding)] == finding:
-                if len(string) > i + len(finding):
-                    if string[i + len(finding)] == ' ':
-                        result.append(i)
-                else:
-                    result.append(i)
-        return result
-
-    fields = {}
-    tables = []
-    is_table = False
-    is_table_heading = False
-    table_heading_raw = ''
-    is_notes = False
-    table_fields = []
-
-    raw = raw.replace(PAGINATION, '').replace('\x1b[37D', '').replace('x1b[37D', '') # remove stupid pagination
-    if "Command:" in raw:
-        raw = raw.split("Command:", 1)[1]
-        raw = "\n".join(raw.splitlines()[2:])
-    for line in raw.splitlines():
-        if '#' in line: # prompt lines
-            continue
-
-        if fullmatch(r'\s*\-{5,}\s*', line.strip()): # divider line
-            is_notes = False
-            if is_table_heading:
-                is_table_heading = False
+        if PAGINATION in tail:
+            channel.send(b'q' if stop else b' ')
+            tail = ''
+        elif RE_CONTINUATION.search(tail):
+            channel.send(b'\n')
+            tail = ''
+        elif RE_CONFIRM.search(tail):
+            channel.send(b'y\n' if confirm else b'n\n')
+            tail = ''
+
+    if parser is not None:
+        if not stop:
+            items = parser.close()
+            if on_items and items:
+                on_items(items)
+        return ''
+    return first_line if echo else ''.join(chunks) # no line break: nothing to drop
+
+def _run_batch(
+    channel: Channel,
+    commands: dict[str, str],
+    olt_name: str,
+    asking: frozenset[str] = frozenset(),
+    timeout: float = READ_TIMEOUT
+) -> dict[str, str]:
+    """Send several commands in few writes and split output by prompts
+
+    OLT reads typed-ahead commands one by one, so output is "echo, output, prompt" for every command.
+    Commands are written at once up to the first one that may ask "{ <cr>|... }:" (listed in `asking`),
+    its question is answered when it shows up, then next commands are written. Output of every command
+    must start with its echo and end with one prompt, otherwise typed-ahead line was read by something
+    else (unexpected question or pagination) and OutputDesyncError is raised, session must be dropped.
+    Args:
+        channel: shell channel
+        commands: name -> command
+        olt_name: OLT name from prompt
+        asking: names of commands that may ask "{ <cr>|... }:"
+        timeout: max time to wait for all prompts
+    Returns:
+        name -> command output without first (echo) line
+    """
+    re_prompt = compile(rf'(?:^|\n)({escape(olt_name)}(?:\([\w\-/]+\))?[#>])')
+    names = list(commands)
+    outputs = {}
+    deadline = monotonic() + timeout
+
+    while len(outputs) < len(names):
+        end = next((i + 1 for i in range(len(outputs), len(names)) if names[i] in asking), len(names))
+        channel.send(bytes(''.join(f'{commands[name]}\n' for name in names[len(outputs):end]), 'utf-8'))
+        pending = '' # output after last prompt
+        scanned = 0 # length of pending already searched for prompt
+        answered = 0 # length of pending already searched for questions
+
+        while len(outputs) < end:
+            ready, _, _ = select([channel], [], [], max(deadline - monotonic(), 0))
+            if not ready:
+                raise TimeoutError(f'{len(outputs)} of {len(names)} commands completed in {timeout} seconds')
+            data = channel.recv(32768)
+            if not data:
+                raise EOFError('ssh channel closed')
+            pending += data.decode('utf-8', errors='ignore').replace('\r', '')
+
+            while len(outputs) < end and (match := re_prompt.search(pending, max(scanned - 64, 0))):
+                command = commands[names[len(outputs)]]
+                echo, _, output = pending[:match.end()].partition('\n')
+                if echo.split() != command.split():
+                    raise OutputDesyncError(f'expected echo of {command!r}, got {echo[:80]!r}')
+                if len(outputs) < end - 1 and RE_QUESTION.search(output): # typed-ahead command was taken as answer
+                    raise OutputDesyncError(f'unexpected question after {command!r}')
+                outputs[names[len(outputs)]] = output
+                pending = pending[match.end():] # next command echo follows prompt
+                scanned = answered = 0
+            scanned = len(pending)
+
+            question = RE_QUESTION.search(pending, answered)
+            if question:
+                if len(outputs) < end - 1:
+                    raise OutputDesyncError(f'unexpected question after {commands[names[len(outputs)]]!r}')
+                channel.send(b' ' if question.group() == PAGINATION else b'\n')
+                answered = question.end()
+    return outputs
+
+def _parse_value(value: str) -> str | float | int | bool | None:
+    """Convert field or cell value to python type"""
+    value = value.strip().rstrip('/')
+    suffix = RE_VALUE_SUFFIX.search(value) # "+06:00", "%" or units
+    if suffix:
+        value = value[:suffix.start()]
+
+    if value == '-':
+        return None
+    if RE_FLOAT.fullmatch(value):
+        return float(value.replace(',', '.'))
+    if RE_INT.fullmatch(value):
+        return int(value)
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    return value
+
+def _find_heading(heading: str, field: str) -> list[int]:
+    """Find offsets of field in table heading (field must be followed by space or end of heading)"""
+    result = []
+    i = heading.find(field)
+    while i != -1:
+        if heading[i + len(field):i + len(field) + 1] in ('', ' '):
+            result.append(i)
+        i = heading.find(field, i + 1)
+    return result
+
+class OutputParser:
+    """Incremental parser of "key : value" fields and tables from command output
+
+    Output is fed in chunks as it is received; every complete line is parsed at once, pagination is
+    removed on the fly. Table columns are split by whitespace; names from next heading lines are
+    appended to column names with "-" ("ONT" + "port-ID" -> "ONT-port-ID"). If output has "Command:"
+    line (echo of command with continuation), everything before it is dropped, so parse errors before
+    it are raised only on close.
+    """
+    def __init__(self, replacements: dict[str, str] | None = None):
+        self.replacements = replacements or {} # applied to every complete line before parsing
+        self._buffer = '' # incomplete last line
+        self._reset()
+
+    def _reset(self):
+        """Drop everything parsed (but not incomplete last line)"""
+        self.fields: dict = {}
+        self.tables: list[list[dict]] = []
+        self._skip_lines = 0
+        self._command_found = False
+        self._error: Exception | None = None # parse error before "Command:" line
+        self._is_table = False
+        self._is_table_heading = False
+        self._heading = '' # first heading line without indent
+        self._heading_indent = 0
+        self._heading_offsets: dict[str, list[int]] = {} # column name -> its offsets in heading, found once per table
+        self._is_notes = False
+        self._table_fields: list[str] = []
+
+    def feed(self, data: str) -> list[tuple]:
+        """Parse complete lines of output chunk
+
+        Returns:
+            completed items: ("field", key, value), ("row", table index, row) and ("reset", None, None)
+            when "Command:" line drops items parsed before it
+        """
+        self._buffer += data
+        end = self._buffer.rfind('\n') + 1
+        if not end:
+            return []
+        complete, self._buffer = self._buffer[:end], self._buffer[end:]
+        return self._parse(complete)
+
+    def close(self) -> list[tuple]:
+        """Parse rest of output (last line without line break)"""
+        rest, self._buffer = self._buffer, ''
+        items = self._parse(rest)
+        if self._error:
+            raise self._error
+        return items
+
+    def result(self) -> tuple[dict, list[list[dict]]]:
+        """Parsed fields and non-empty tables"""
+        return self.fields, [table for table in self.tables if table]
+
+    def _parse(self, text: str) -> list[tuple]:
+        items = []
+        text = text.replace(PAGINATION, '').replace('\x1b[37D', '').replace('x1b[37D', '') # remove stupid pagination
+        for old, new in self.replacements.items():
+            text = text.replace(old, new)
+        for line in text.splitlines():
+            if not self._command_found and 'Command:' in line:
+                self._reset() # "Command:" line, command and everything before it is not an output
+                self._command_found = True
+                self._skip_lines = 1
+                items.append(('reset', None, None))
+                continue
+            if self._skip_lines:
+                self._skip_lines -= 1
                 continue
-            if is_table and not is_table_heading:
-                is_table = False
-            continue
+            if self._error:
+                continue
+            try:
+                item = self._parse_line(line)
+            except (IndexError, ValueError) as e:
+                if self._command_found:
+                    raise
+                self._error = e
+                continue
+            if item:
+                items.append(item)
+        return items
 
-        # if line == PAGINATION: # pagination line
-        #     continue
+    def _parse_line(self, line: str) -> tuple | None:
+        if '#' in line: # prompt lines
+            return
 
-        # if PAGINATION in line: # partially-pagination line
-        #     line = line.strip(PAGINATION).strip('\x1b[37D').strip('x1b[37D')
+        stripped = line.strip()
+        if len(stripped) >= 5 and not stripped.strip('-'): # divider line
+            self._is_notes = False
+            if self._is_table_heading:
+                self._is_table_heading = False
+            elif self._is_table:
+                self._is_table = False
+            return
 
-        if line.strip().startswith('Note') or is_notes: # notes line
-            is_notes = True
-            continue
+        if stripped.startswith('Note') or self._is_notes: # notes line
+            self._is_notes = True
+            return
 
         if ':' in line: # standalone field line
-            is_table = False
-            pair = list(map(lambda i: i.strip(), line.strip().split(':', maxsplit=1)))
-            fields[pair[0]] = _parse_value(pair[-1])
-            continue
-
-        if is_table and not is_table_heading: # table field line
-            tables[-1].append({key: _parse_value(value.strip()) for key, value in zip(table_fields, split(r'\s+', line.strip()))})
-            continue
-
-        if not is_table and len(split(r'\s+', line)) > 1: # table start heading line
-            is_table = True
-            is_table_heading = True
-            table_heading_raw = line
-            table_fields = [c for c in split(r'\s+', line.strip()) if c]
-            tables.append([])
-            continue
-
-        if is_table_heading: # table next heading line
-            line = line[len(table_heading_raw) - len(table_heading_raw.lstrip()):]
+            self._is_table = False
+            key, value = stripped.split(':', maxsplit=1)
+            key = key.strip()
+            self.fields[key] = _parse_value(value)
+            return 'field', key, self.fields[key]
+
+        if self._is_table and not self._is_table_heading: # table field line
+            row = {key: _parse_value(value) for key, value in zip(self._table_fields, stripped.split() or [''])}
+            self.tables[-1].append(row)
+            return 'row', len(self.tables) - 1, row
+
+        if not self._is_table and RE_SPACE.search(line): # table start heading line
+            self._is_table = True
+            self._is_table_heading = True
+            self._heading = line.lstrip()
+            self._heading_indent = len(line) - len(self._heading)
+            self._heading_offsets = {}
+            self._table_fields = line.split()
+            self.tables.append([])
+            return
+
+        if self._is_table_heading: # table next heading line
+            line = line[self._heading_indent:]
             full_line = line
-            # print('begin table parse; fields:', table_fields, 'appendixes line:', line)
+            table_fields = self._table_fields
 
             for i, field in enumerate(table_fields):
-                raw_index = _find_all(table_heading_raw.lstrip(), field)[table_fields[:i].count(field)]
-                # print('found fields:', _find_all(table_heading_raw.lstrip(), field))
+                if field not in self._heading_offsets:
+                    self._heading_offsets[field] = _find_heading(self._heading, field)
+                raw_index = self._heading_offsets[field][table_fields[:i].count(field)]
 
-                if search(r'\w', full_line[raw_index:raw_index + len(field)]):
-                    # print('found non space appendix:', full_line[raw_index:raw_index + len(field)] + '... for', field)
+                if RE_WORD.search(full_line, raw_index, raw_index + len(field)):
                     appendix = line.lstrip().split(' ', maxsplit=1)[0]
-                    # print('cleaned appendix:', appendix)
                     table_fields[i] += '-' + appendix
-                    # print('invoked to field:', table_fields[i])
                     line = line[line.index(appendix) + len(appendix):]
-                    # print('line truncated:', line)
-
                 else:
-                    # print('found space appendix for', field)
-                    # spaces += len(table_heading_raw[:raw_index]) - len(table_heading_raw[:raw_index].rstrip()) - 1
                     line = line[len(field):]
-                    # print('line truncated:', line)
 
-    return fields, [table for table in tables if table]
+def _parse_output(raw: str, replacements: dict[str, str] | None = None) -> tuple[dict, list[list[dict]]]:
+    """Parse "key : value" fields and tables from command output"""
+    parser = OutputParser(replacements)
+    parser.feed(raw)
+    parser.close()
+    return parser.result()
 
 def _parse_basic_info(raw: str) -> dict:
     """Parse basic ONT info"""
@@ -396,13 +825,17 @@ def _parse_optical_info(raw: str) -> dict:
 
 def _parse_port_status(raw: str) -> bool:
     """Parse ONT port status"""
+    if 'Failure:' in raw:
+        return False
     _, tables = _parse_output(raw)
     return tables[0][0].get('Port-switch') or tables[0][0].get('switch') or tables[0][0].get('Port') or False
 
 def _parse_eth_ports_status(raw: str) -> list[dict]:
     """Parse ONT eth ports status"""
+    if 'Failure:' in raw: # ONT is not online, port does not exist
+        return []
     _, tables = _parse_output(raw)
-    return [{'id': table.get('ONT-port-ID'), 'status': table.get('LinkState') or False, 'speed': table.get('Speed-(Mbps)')} for table in tables[0]]
+    return [{'id': table.get('ONT-port-ID'), 'status': table.get('LinkState') or False, 'speed': table.get('Speed(Mbps)')} for table in tables[0]]
 
 def _parse_service_port(raw: str, interface: dict) -> int | None:
     raw = raw.replace(
@@ -417,60 +850,116 @@ def _parse_service_port(raw: str, interface: dict) -> int | None:
 def _parse_mac(raw: str) -> str | None:
     if 'Failure: There is not any MAC address record' in raw:
         return
-    raw = raw.replace('MAC TYPE', 'MAC-TYPE') # avoid extra spaces for better parsing (prefer "-")
-    return format_mac(_parse_output(raw)[1][0][0].get('MAC'))
+    return format_mac(_parse_output(raw, MAC_HEADING)[1][0][0].get('MAC'))
+
+def _read_first_row(channel: Channel, replacements: dict[str, str] | None = None) -> dict | None:
+    """Read command output until first table row is parsed, rest of it is skipped"""
+    rows = []
+
+    def on_items(items: list[tuple]) -> bool:
+        for kind, _, item in items:
+            if kind == 'reset':
+                rows.clear()
+            elif kind == 'row':
+                rows.append(item)
+        return bool(rows)
+
+    _read_output(channel, parser=OutputParser(replacements), on_items=on_items)
+    return rows[0] if rows else None
+
+def _parse_boards(output: str) -> list[int]:
+    """Parse `display board`: slots of PON boards in normal state"""
+    return [int(board.group(1)) for board in RE_PON_BOARD.finditer(output) if board.group(3).lower() == 'normal']
+
+class OntSummaryParser:
+    """Incremental parser of port summary (`display ont info summary`)
+
+    Fed in chunks like OutputParser, so whole output of port is never kept. Rows of state table and
+    SN/optical table are joined by ONT id.
+    """
+    def __init__(self):
+        self.total: tuple[int, int] | None = None # ONTs, online ONTs
+        self.port_missing = False # "% Parameter error" instead of summary
+        self.onts: dict[int, dict] = {}
+        self._buffer = '' # incomplete last line
+
+    def feed(self, data: str):
+        """Parse complete lines of output chunk"""
+        self._buffer += data
+        end = self._buffer.rfind('\n') + 1
+        if end:
+            complete, self._buffer = self._buffer[:end], self._buffer[end:]
+            self._parse(complete)
+
+    def close(self):
+        """Parse rest of output (last line without line break)"""
+        rest, self._buffer = self._buffer, ''
+        self._parse(rest)
+
+    def result(self) -> tuple[int, int, list[dict]] | tuple[dict, None, None]:
+        """Online and offline ONTs count and ONTs, or fail result if output is not a summary"""
+        if self.total is None and self.port_missing:
+            return {"status": "fail", "detail": "port does not exist"}, None, None
+        if self.total is None:
+            print("error summary ont: total regexp fail")
+            return {"status": "fail", "detail": "total regexp fail"}, None, None
+
+        total, online = self.total
+        return online, total - online, [
+            {
+                "id": id,
+                "status": ont.get("status"),
+                "uptime": ont.get("uptime"),
+                "downtime": ont.get("downtime"),
+                "cause": ont.get("cause"),
+                "sn": ont.get("sn"),
+                "name": ont.get("name"),
+                "distance": ont.get("distance"),
+                "rx": ont.get("rx"),
+                "tx": ont.get("tx")
+            } for id, ont in self.onts.items()
+        ]
+
+    def _parse(self, text: str):
+        text = text.replace(PAGINATION, '').replace('\x1b[37D', '').replace('x1b[37D', '') # remove stupid pagination
+        for line in text.splitlines():
+            line = line.strip()
+            if state := RE_ONT_SUMMARY_DATA1.fullmatch(line):
+                self.onts.setdefault(int(state.group(1)), {}).update({
+                    "status": state.group(2) == 'online',
+                    "uptime": _parse_value(state.group(3)),
+                    "downtime": _parse_value(state.group(4)),
+                    "cause": _parse_value(state.group(5)) if state.group(5) else None
+                })
+            elif info := RE_ONT_SUMMARY_DATA2.fullmatch(line):
+                self.onts.setdefault(int(info.group(1)), {}).update({
+                    "sn": info.group(2),
+                    "type": info.group(3),
+                    "distance": _parse_value(info.group(4)),
+                    "rx": _parse_value(info.group(5)),
+                    "tx": _parse_value(info.group(6)),
+                    "name": info.group(7) or None
+                })
+            elif self.total is None and (total := RE_ONT_SUMMARY_TOTAL.search(line)):
+                self.total = int(total.group(2)), int(total.group(3))
+            elif '% Parameter error' in line:
+                self.port_missing = True
 
 def _parse_onts_info(output: str) -> tuple[int, int, list[dict]] | tuple[dict, None, None]:
-    out = [line.strip() for line in (output.replace(PAGINATION_WITH_SPACES, "").split(DIVIDER))]
-
-    if len(out) < 2:
-        return {"status": "fail", "detail": "not enough sections"}, None, None
-
-    total = fullmatch(r'^In port \d*/\d*/\d*, the total of ONTs are: (\d*), online: (\d*)$', out[1])
-    if total is None:
-        print("error summary ont: total regexp fail")
-        return {"status": "fail", "detail": "total regexp fail"}, None, None
-
-    online = int(total.group(1))
-    offline = int(total.group(2))
-
-    onts: list[dict] = []
-
-    for section in out[2:]:
-        if not section or len(section) < 10:
-            continue
-
-        fields, _ = _parse_output(section)
-
-        ont_id = fields.get("ONT-ID")
-        if ont_id is None:
-            continue
-
-        ont = {
-            "id": ont_id,
-            "status": fields.get("Run state"),
-            "uptime": fields.get("ONT online duration"),
-            "downtime": fields.get("Last down time"),
-            "cause": fields.get("Last down cause"),
-            "sn": fields.get("SN"),
-            "name": fields.get("Description"),
-            "distance": fields.get("ONT distance(m)"),
-            "rx": fields.get("Optical rx power") or fields.get("RX power") or fields.get("rx"),
-            "tx": fields.get("Optical tx power") or fields.get("TX power") or fields.get("tx"),
-        }
-
-        onts.append(ont)
-
-    return online, offline, onts
+    """Parse port summary: state table and SN/optical table, rows are joined by ONT id"""
+    parser = OntSummaryParser()
+    parser.feed(output)
+    parser.close()
+    return parser.result()
 
 def _ping(ip: str) -> None | str:
-    """Ping ONT by IP"""
+    """Ping ONT by IP, round-trip time as ping utility prints it ("12.3 ms")"""
     try:
-        result = run(['ping', '-c', '1', '-W', '300', ip], capture_output=True, text=True, timeout=1)
-
-        if result.returncode == 0:
-            time_match = search(r'time=([0-9.]+)', result.stdout)
-            return f"{time_match.group(1)} ms" if time_match else "-"
+        rtt = ping(ip)
+    except OSError as e:
+        print(f'error ping ont: {e.__class__.__name__}: {e}')
+        return None
+    if rtt is None:
         return None
-    except Exception:
-        return None
\ No newline at end of file
+    digits = 3 if rtt < 1 else 2 if rtt < 10 else 1 if rtt < 100 else 0
+    return f'{rtt:.{digits}f} ms'
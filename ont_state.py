@@ -0,0 +1,107 @@
+"""Latest ONT states from background OLT sweeps"""
+from asyncio import gather, sleep
+from collections.abc import Callable
+from time import time
+from typing import NamedTuple
+
+from olt_scheduler import sweep_ont_summary
+
+POLL_INTERVAL = 900 # seconds between sweeps of all OLTs
+MAX_AGE = 1800 # default max age (s) of state served instead of live diagnosis
+
+
+class OntState(NamedTuple):
+    """ONT state from port summary"""
+    olt_id: int
+    fibre: int
+    service: int
+    port: int
+    ont_id: int
+    online: bool | None
+    rx: float | None
+    tx: float | None
+    distance: int | None
+    last_up: str | None
+    last_down: str | None
+    last_down_cause: str | None
+    updated_at: float
+
+    def to_dict(self) -> dict:
+        """Part of `search_ont` result available from port summary"""
+        return {
+            'interface': {
+                'name': f'{self.fibre}/{self.service}/{self.port}',
+                'fibre': self.fibre,
+                'service': self.service,
+                'port': self.port
+            },
+            'ont_id': self.ont_id,
+            'online': self.online,
+            'distance': self.distance,
+            'last_up': self.last_up,
+            'last_down': self.last_down,
+            'last_down_cause': self.last_down_cause,
+            'optical': {'rx': self.rx, 'tx': self.tx}
+        }
+
+
+class OntStateStore:
+    """SN -> latest ONT state
+
+    All PON ports of every online OLT are swept with `display ont info summary` every
+    `poll_interval` seconds. ONTs not found in successful sweep of their OLT are dropped.
+    """
+    def __init__(self, poll_interval: float = POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.polled_at: float | None = None
+        self._states: dict[str, OntState] = {}
+        self._errors = 0
+
+    def get(self, sn: str) -> OntState | None:
+        return self._states.get(sn)
+
+    async def poll_olt(self, olt: dict):
+        """Sweep one OLT and update states of its ONTs"""
+        seen = set()
+        failed = False
+        async for result in sweep_ont_summary(olt['host']):
+            if result.get('status') != 'success':
+                failed = True
+                continue
+            now = time()
+            interface = result['interface']
+            for ont in result['onts']:
+                if not ont['sn']:
+                    continue
+                seen.add(ont['sn'])
+                self._states[ont['sn']] = OntState(
+                    olt['id'], interface['fibre'], interface['service'], interface['port'], ont['id'],
+                    ont['status'], ont['rx'], ont['tx'], ont['distance'], ont['uptime'], ont['downtime'],
+                    ont['cause'], now
+                )
+        if failed:
+            self._errors += 1
+            return
+        for sn in [sn for sn, state in self._states.items() if state.olt_id == olt['id'] and sn not in seen]:
+            del self._states[sn]
+
+    async def poll(self, olts: list[dict]):
+        """Sweep all online OLTs (concurrently, every OLT has its own session limit)"""
+        await gather(*[self.poll_olt(olt) for olt in olts if olt['online']])
+        self.polled_at = time()
+
+    async def run(self, get_olts: Callable[[], list[dict]]):
+        """Sweep OLTs forever (run as background task). OLT list is taken anew for every sweep"""
+        while True:
+            try:
+                await self.poll(get_olts())
+            except Exception as e:
+                print(f'error poll onts: {e.__class__.__name__}: {e}')
+            await sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._states),
+            'polled_at': self.polled_at,
+            'failed_sweeps': self._errors
+        }
@@ -0,0 +1,153 @@
+"""ICMP echo (ping) of many hosts over one socket"""
+from collections import deque
+from ipaddress import IPv4Address
+from itertools import count as counter
+from os import getpid
+from select import select
+from socket import socket, AF_INET, SOCK_DGRAM, SOCK_RAW, IPPROTO_ICMP, SOL_SOCKET, SO_RCVBUF
+from struct import pack, unpack_from
+from time import monotonic
+
+PING_TIMEOUT = 1 # max wait (s) for reply to every echo request
+PING_INTERVAL = 0.2 # delay (s) between echo requests to same host when count > 1
+PING_PAYLOAD = b'smartlink-ping-00' # echo data, replies with other data are ignored
+PING_BURST = 64 # echo requests sent before reading replies, so socket receive buffer doesn't overflow
+PING_RCVBUF = 1 << 20 # requested socket receive buffer (bytes), kernel may cap it
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+_calls = counter() # makes identifier of every ping_many call unique within process
+
+
+def _checksum(data: bytes) -> int:
+    """Internet checksum (RFC 1071)"""
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(unpack_from(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+def _echo_request(identifier: int, sequence: int) -> bytes:
+    header = pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    return pack('!BBHHH', ICMP_ECHO_REQUEST, 0, _checksum(header + PING_PAYLOAD), identifier, sequence) + PING_PAYLOAD
+
+def _open_socket() -> tuple[socket, bool]:
+    """Open unprivileged ICMP datagram socket, or raw socket if not allowed (needs root/CAP_NET_RAW)
+
+    Returns:
+        socket, is raw
+    """
+    try:
+        return socket(AF_INET, SOCK_DGRAM, IPPROTO_ICMP), False
+    except PermissionError:
+        return socket(AF_INET, SOCK_RAW, IPPROTO_ICMP), True
+
+def _parse_reply(packet: bytes) -> tuple[int, int] | None:
+    """Get (identifier, sequence) of echo reply. Raw sockets (and datagram ones on BSD) return IP header too"""
+    if packet and packet[0] >> 4 == 4:
+        packet = packet[(packet[0] & 0x0f) * 4:]
+    if len(packet) < 8 or packet[0] != ICMP_ECHO_REPLY or packet[8:] != PING_PAYLOAD:
+        return None
+    _, _, _, identifier, sequence = unpack_from('!BBHHH', packet)
+    return identifier, sequence
+
+def ping_many(ips: list[str], count: int = 1, timeout: float = PING_TIMEOUT, interval: float = PING_INTERVAL) -> dict[str, dict]:
+    """Ping hosts concurrently
+
+    Echo requests to all hosts are sent from one socket at once (`count` rounds `interval` apart),
+    every request waits for its reply not longer than `timeout`.
+    Args:
+        ips: IPv4 addresses
+        count: echo requests per host
+        timeout: max wait for every reply (s)
+        interval: delay between rounds (s)
+    Returns:
+        {ip: {'sent', 'received', 'loss' (%), 'min', 'avg', 'max' (ms, None if no replies)}}
+    Raises:
+        PermissionError: if ICMP sockets are not allowed
+    """
+    ips = list(dict.fromkeys(ips))
+    rtts: dict[str, list[float]] = {ip: [] for ip in ips}
+    sent: dict[str, int] = {ip: 0 for ip in ips}
+    targets = [ip for ip in ips if _is_ipv4(ip)]
+    if targets:
+        sock, raw = _open_socket()
+        try:
+            _exchange(sock, raw, targets, count, timeout, interval, sent, rtts)
+        finally:
+            sock.close()
+
+    return {
+        ip: {
+            'sent': sent[ip],
+            'received': len(rtts[ip]),
+            'loss': round(100 - len(rtts[ip]) / sent[ip] * 100, 1) if sent[ip] else 100.0,
+            'min': round(min(rtts[ip]), 3) if rtts[ip] else None,
+            'avg': round(sum(rtts[ip]) / len(rtts[ip]), 3) if rtts[ip] else None,
+            'max': round(max(rtts[ip]), 3) if rtts[ip] else None
+        } for ip in ips
+    }
+
+def _exchange(sock: socket, raw: bool, ips: list[str], count: int, timeout: float, interval: float,
+              sent: dict[str, int], rtts: dict[str, list[float]]):
+    """Send echo requests and collect replies until all are answered or timed out"""
+    identifier = (getpid() + next(_calls)) & 0xffff # datagram sockets replace it with socket port, raw ones get all replies of host
+    sock.setblocking(False)
+    sock.setsockopt(SOL_SOCKET, SO_RCVBUF, PING_RCVBUF)
+    started = monotonic()
+    schedule = deque((started + round_ * interval, ip) for round_ in range(count) for ip in ips)
+    pending: dict[int, tuple[str, float]] = {} # sequence -> (ip, sent at)
+    order: deque[tuple[float, int]] = deque() # (sent at, sequence) in send order, for expiry
+    sequence = 0
+
+    while schedule or pending:
+        now = monotonic()
+        burst = 0
+        while schedule and schedule[0][0] <= now and burst < PING_BURST:
+            burst += 1
+            _, ip = schedule.popleft()
+            sequence = (sequence + 1) & 0xffff
+            sent[ip] += 1
+            try:
+                sock.sendto(_echo_request(identifier, sequence), (ip, 0))
+            except OSError:
+                continue # unreachable network or full buffer: counted as lost
+            pending[sequence] = (ip, monotonic())
+            order.append((pending[sequence][1], sequence))
+        while order and order[0][0] + timeout <= now:
+            pending.pop(order.popleft()[1], None)
+        if not schedule and not pending:
+            break
+
+        deadlines = [order[0][0] + timeout] if order else []
+        if schedule:
+            deadlines.append(schedule[0][0])
+        ready, _, _ = select([sock], [], [], max(min(deadlines) - monotonic(), 0))
+        if not ready:
+            continue
+        while True:
+            try:
+                packet, (address, _) = sock.recvfrom(1024)
+            except OSError: # nothing to read or ICMP error reported on datagram socket
+                break
+            received_at = monotonic()
+            reply = _parse_reply(packet)
+            if reply is None or raw and reply[0] != identifier:
+                continue
+            target = pending.get(reply[1])
+            if target is not None and target[0] == address:
+                del pending[reply[1]]
+                rtts[address].append((received_at - target[1]) * 1000)
+
+def ping(ip: str, timeout: float = PING_TIMEOUT) -> float | None:
+    """Ping host once and return round-trip time (ms) or None if no reply"""
+    return ping_many([ip], timeout=timeout)[ip]['avg']
+
+def _is_ipv4(ip: str) -> bool:
+    try:
+        IPv4Address(ip)
+        return True
+    except ValueError:
+        return False
@@ -0,0 +1,216 @@
+"""Reference data from UserSide (tariffs, customer groups, OLTs...) with on-disk snapshot"""
+from asyncio import Task, create_task, gather, shield, sleep
+from collections.abc import Awaitable, Callable
+from html import unescape
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from time import monotonic, time
+
+from api import api_call_async
+
+SNAPSHOT_PATH = Path(__file__).resolve().parent / 'reference_snapshot.json' # last loaded reference data
+REFRESH_INTERVALS = { # dataset -> seconds between background reloads
+    'tariffs': 600,
+    'customer_groups': 3600,
+    'addatas': 3600,
+    'tmc_categories': 3600,
+    'olts': 600,
+    'divisions': 3600
+}
+RETRY_INTERVAL = 60 # seconds before retry of failed reload
+MISS_REFRESH_INTERVAL = 30 # min seconds between reloads of dataset caused by unknown keys
+
+
+async def _load_tariffs() -> dict:
+    return {
+        tariff['billing_uuid']: unescape(tariff['name'])
+        for tariff in (await api_call_async('tariff', 'get', use_cache=False))['data'].values()
+    }
+
+async def _load_customer_groups() -> dict:
+    return {
+        group['id']: group['name']
+        for group in (await api_call_async('customer', 'get_customer_group', use_cache=False))['data'].values()
+    }
+
+async def _load_addatas() -> dict:
+    return {
+        str(data['id']): unescape(data['available_value'][0]).split('\n')
+        for data in (await api_call_async('additional_data', 'get_list', 'section=17', use_cache=False))['data'].values()
+        if 'available_value' in data
+    }
+
+async def _load_tmc_categories() -> list:
+    return [
+        {
+            'id': section['id'],
+            'name': section['name'],
+            'type_id': section['type_id'],
+            'parent_id': section['parent_id'] if section['parent_id'] != 0 else None
+        } for section in (await api_call_async('inventory', 'get_inventory_section_catalog', use_cache=False))['data']
+            .values()
+    ]
+
+async def _load_olts() -> list:
+    return [
+        {
+            'id': olt['id'],
+            'device': olt['name'],
+            'host': olt['host'],
+            'online': bool(olt['is_online']),
+            'location': unescape(olt['location'])
+        } for olt in (await api_call_async('device', 'get_data', 'object_type=olt&is_hide_ifaces_data=1',
+            use_cache=False))['data'].values()
+    ]
+
+async def _load_divisions() -> list:
+    return [
+        {
+            'id': division['id'],
+            'parent_id': division['parent_id'],
+            'name': unescape(division['name'])
+        } for division in (await api_call_async('employee', 'get_division_list', use_cache=False))['data'].values()
+    ]
+
+LOADERS: dict[str, Callable[[], Awaitable[dict | list]]] = { # app.state attribute -> loader
+    'tariffs': _load_tariffs,
+    'customer_groups': _load_customer_groups,
+    'addatas': _load_addatas,
+    'tmc_categories': _load_tmc_categories,
+    'olts': _load_olts,
+    'divisions': _load_divisions
+}
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> dict[str, dict | list] | None:
+    """Read reference data saved by `write_snapshot`. None if file is missing, broken or incomplete"""
+    try:
+        snapshot = loads(path.read_text('utf-8'))
+        data = {
+            name: dict(value['items']) if 'items' in value else value['list']
+            for name, value in snapshot['data'].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f'error read reference snapshot: {e.__class__.__name__}: {e}')
+        return None
+    if set(data) != set(LOADERS):
+        return None
+    return data
+
+def write_snapshot(data: dict[str, dict | list], path: Path = SNAPSHOT_PATH):
+    """Save reference data atomically. Dicts are saved as (key, value) pairs to keep non-string keys"""
+    snapshot = {
+        'saved_at': time(),
+        'data': {
+            name: {'items': list(value.items())} if isinstance(value, dict) else {'list': value}
+            for name, value in data.items()
+        }
+    }
+    temp = path.with_suffix('.tmp')
+    temp.write_text(dumps(snapshot, ensure_ascii=False), 'utf-8')
+    replace(temp, path)
+
+
+class ReferenceData:
+    """Reference datasets kept up to date
+
+    Every dataset is reloaded in background on its own interval (`REFRESH_INTERVALS`). Unknown key
+    in `lookup` reloads its dataset once (concurrent misses wait for the same reload, not more often
+    than `MISS_REFRESH_INTERVAL`). Reloaded dataset is swapped in with a new snapshot dict, so readers
+    always see complete datasets.
+    """
+    def __init__(self, intervals: dict[str, float] = REFRESH_INTERVALS, snapshot_path: Path = SNAPSHOT_PATH):
+        self.intervals = intervals
+        self.snapshot_path = snapshot_path
+        self._data: dict[str, dict | list] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._due: dict[str, float] = {} # dataset -> monotonic time of next background reload
+        self._reloads: dict[str, Task] = {} # running reloads
+        self._miss_reloaded_at: dict[str, float] = {}
+        self._stats = {'reloads': 0, 'errors': 0, 'misses': 0, 'miss_reloads': 0}
+
+    def __getitem__(self, name: str) -> dict | list:
+        return self._data[name]
+
+    def load_snapshot(self) -> bool:
+        """Use data saved on previous run. Datasets are still due for reload"""
+        data = read_snapshot(self.snapshot_path)
+        if data is None:
+            return False
+        self._data = data
+        return True
+
+    async def reload(self, name: str) -> bool:
+        """Reload dataset from UserSide. Concurrent calls share one request"""
+        task = self._reloads.get(name)
+        if task is None:
+            task = create_task(self._reload(name))
+            self._reloads[name] = task
+            task.add_done_callback(lambda _: self._reloads.pop(name, None))
+        return await shield(task)
+
+    async def _reload(self, name: str) -> bool:
+        try:
+            value = await LOADERS[name]()
+        except Exception as e:
+            print(f'error load {name}: {e.__class__.__name__}: {e}')
+            self._stats['errors'] += 1
+            self._due[name] = monotonic() + RETRY_INTERVAL
+            return False
+        self._data = {**self._data, name: value}
+        self._loaded_at[name] = time()
+        self._due[name] = monotonic() + self.intervals.get(name, RETRY_INTERVAL)
+        self._stats['reloads'] += 1
+        return True
+
+    async def reload_all(self, names: list[str] | None = None) -> bool:
+        """Reload datasets concurrently and save snapshot if all of them are loaded"""
+        results = await gather(*[self.reload(name) for name in names or LOADERS])
+        if len(self._data) == len(LOADERS):
+            try:
+                write_snapshot(self._data, self.snapshot_path)
+            except OSError as e:
+                print(f'error write reference snapshot: {e.__class__.__name__}: {e}')
+        return all(results)
+
+    async def run(self):
+        """Reload datasets when they are due (run as background task)"""
+        while True:
+            now = monotonic()
+            due = [name for name in LOADERS if self._due.get(name, 0) <= now]
+            if due:
+                await self.reload_all(due)
+                continue
+            await sleep(min(self._due.values()) - now)
+
+    async def lookup(self, name: str, key, default=None):
+        """Get item of dataset by key (by 'id' for list datasets), reload dataset if key is unknown"""
+        item = self._find(name, key)
+        if item is not None:
+            return item
+        self._stats['misses'] += 1
+        if name in self._reloads:
+            await shield(self._reloads[name])
+        elif monotonic() - self._miss_reloaded_at.get(name, -MISS_REFRESH_INTERVAL) >= MISS_REFRESH_INTERVAL:
+            self._miss_reloaded_at[name] = monotonic()
+            self._stats['miss_reloads'] += 1
+            await self.reload(name)
+        item = self._find(name, key)
+        return default if item is None else item
+
+    def _find(self, name: str, key):
+        data = self._data[name]
+        if isinstance(data, dict):
+            return data.get(key)
+        return next((item for item in data if item['id'] == key), None)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            'datasets': {
+                name: {'size': len(value), 'loaded_at': self._loaded_at.get(name)}
+                for name, value in self._data.items()
+            }
+        }
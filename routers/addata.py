@@ -4,8 +4,8 @@ from fastapi.requests import Request
 router = APIRouter(prefix='/addata')
 
 @router.get('/options')
-def api_get_options_list(request: Request):
+async def api_get_options_list(request: Request):
     return {
         'status': 'success',
-        'data': request.app.state.addatas
+        'data': request.app.state.reference['addatas']
     }
@@ -1,21 +1,37 @@
-from fastapi import APIRouter
+from asyncio import Semaphore, gather
 
-from api import api_call
-from utils import normalize_items, get_attach_url
+from fastapi import APIRouter, Query
+
+from api import api_call_async
+from utils import normalize_items, get_attach_url, str_to_list
 
 router = APIRouter(prefix='/attachs')
+TASK_CONCURRENCY = 10 # max simultaneous task attachments requests
 
 @router.get('/customer/{id}')
-def api_get_attachs(id: int, include_task: bool = False):
-    attachs = normalize_items(api_call('attach', 'get', f'object_id={id}&object_type=customer'))
+async def api_get_attachs(
+    id: int,
+    include_task: bool = False,
+    task_limit: int | None = Query(None, ge=1) # scan only N most recent tasks
+):
+    semaphore = Semaphore(TASK_CONCURRENCY)
+
+    async def _get_task_attachs(task: int) -> list[dict]:
+        async with semaphore:
+            task_attachs = list(normalize_items(await api_call_async('attach', 'get',
+                f'object_id={task}&object_type=task')))
+        for attach in task_attachs:
+            attach['source'] = 'task'
+        return task_attachs
+
+    attachs = list(normalize_items(await api_call_async('attach', 'get', f'object_id={id}&object_type=customer')))
     if include_task:
-        tasks = api_call('task', 'get_list', f'customer_id={id}')['list'].split(',')
-        for task in tasks:
-            task_attachs = normalize_items(api_call('attach', 'get',
-                f'object_id={task}&object_type=task'))
-            if isinstance(task_attachs, dict):
-                for attach in task_attachs: attach['source'] = 'task'
-                attachs.extend(task_attachs)
+        tasks = list(map(int, str_to_list((await api_call_async('task', 'get_list', f'customer_id={id}'))['list'])))
+        if task_limit is not None:
+            tasks = sorted(tasks, reverse=True)[:task_limit] # newer tasks have bigger ids
+        # gather keeps tasks order, so result order does not depend on response timings
+        for task_attachs in await gather(*map(_get_task_attachs, tasks)):
+            attachs.extend(task_attachs)
     return {
         'status': 'success',
         'data': [{
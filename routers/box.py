@@ -1,31 +1,99 @@
-from fastapi import APIRouter
+from asyncio import Semaphore, create_task, gather, wait
+
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
-from api import api_call
-from utils import extract_sn, normalize_items, remove_sn, status_to_str, list_to_str, str_to_list, get_coordinates, get_box_map_link
+from api import api_call_async
+from ping import ping_many
+from utils import extract_sn, normalize_items, remove_sn, status_to_str, list_to_str, str_to_list, get_coordinates, get_box_map_link,\
+    chunks, get_customer_ip
 
 router = APIRouter(prefix='/box')
+ONU_CONCURRENCY = 10 # max simultaneous ONU level lookups
+ONU_DEADLINE = 10 # seconds to wait for all ONU levels
+MAX_ONU_CONCURRENCY = ONU_CONCURRENCY * 2 # upper bound of onu_concurrency query parameter
+MAX_ONU_DEADLINE = 30 # upper bound (s) of onu_deadline query parameter
+TASKS_CHUNK = 50 # customers per task get_list call
+OPEN_TASK_STATES = '18,3,17,11,1,16,19'
 
 @router.get('/{id}')
-def api_get_box(
+async def api_get_box(
     id: int,
     get_onu_level: bool = False,
     get_tasks: bool = False,
+    get_ping: bool = False,
     limit: int | None = None,
-    exclude_customer_ids: list[int] = []
+    exclude_customer_ids: list[int] = [],
+    onu_concurrency: int = Query(ONU_CONCURRENCY, ge=1, le=MAX_ONU_CONCURRENCY),
+    onu_deadline: float = Query(ONU_DEADLINE, gt=0, le=MAX_ONU_DEADLINE)
 ):
-    def _get_onu_level(name) -> float | None:
-        if extract_sn(name) is None:
-            return
-        data = api_call('device', 'get_ont_data', f'id={extract_sn(name)}').get('data')
+    semaphore = Semaphore(onu_concurrency)
+
+    async def _get_onu_level(sn: str) -> float | None:
+        async with semaphore:
+            data = (await api_call_async('device', 'get_ont_data', f'id={sn}')).get('data')
         if not isinstance(data, dict):
             return
         return data.get('level_onu_rx')
 
-    def _get_tasks(entity: str, entity_id: int) -> list[int]:
-        res = api_call('task', 'get_list', f'{entity}_id={entity_id}&state_id=18,3,17,11,1,16,19')
+    async def _set_onu_levels(customers: list[dict]):
+        """Get ONU levels concurrently. Customers not finished before deadline are marked pending"""
+        lookups = {
+            create_task(_get_onu_level(customer['sn'])): customer
+            for customer in customers if customer['sn'] is not None
+        }
+        if not lookups:
+            return
+        done, pending = await wait(lookups, timeout=onu_deadline)
+        for lookup in pending:
+            lookup.cancel()
+            lookups[lookup]['onu_level_pending'] = True
+        for lookup in done:
+            if lookup.exception() is not None:
+                print(f'error get onu level: {lookup.exception().__class__.__name__}: {lookup.exception()}')
+                continue
+            lookups[lookup]['onu_level'] = lookup.result()
+
+    async def _set_pings(customers: list[dict]):
+        """Ping IPs of all customers at once"""
+        ips = [customer['ip'] for customer in customers if customer['ip'] is not None]
+        if not ips:
+            return
+        try:
+            pings = await run_in_threadpool(ping_many, ips)
+        except OSError as e:
+            print(f'error ping customers: {e.__class__.__name__}: {e}')
+            return
+        for customer in customers:
+            if customer['ip'] is not None:
+                customer['ping'] = pings[customer['ip']]['avg']
+
+    async def _get_tasks(entity: str, entity_id: int | str) -> list[int]:
+        res = await api_call_async('task', 'get_list', f'{entity}_id={entity_id}&state_id={OPEN_TASK_STATES}')
         return list(map(int, str_to_list(res.get('list', ''))))
 
+    async def _get_customers_tasks_page(customer_ids: list[int]) -> dict[int, list[int]]:
+        """Get open tasks of several customers (one get_list + one show call)"""
+        task_ids = await _get_tasks('customer', list_to_str(customer_ids))
+        tasks: dict[int, list[int]] = {customer_id: [] for customer_id in customer_ids}
+        if not task_ids:
+            return tasks
+        shown = {
+            int(task['id']): task
+            for task in normalize_items(await api_call_async('task', 'show', f'id={list_to_str(task_ids)}'))
+        }
+        for task_id in task_ids: # keep get_list order
+            for customer_id in shown.get(task_id, {}).get('customer', []):
+                if int(customer_id) in tasks:
+                    tasks[int(customer_id)].append(task_id)
+        return tasks
+
+    async def _get_customers_tasks(customer_ids: list[int]) -> dict[int, list[int]]:
+        """Get open tasks of customers grouped by customer. Calls count depends on pages, not customers"""
+        pages = await gather(*[_get_customers_tasks_page(page) for page in chunks(customer_ids, TASKS_CHUNK)])
+        return {customer_id: tasks for page in pages for customer_id, tasks in page.items()}
+
     def _build_customer(customer: dict) -> dict | None:
         name = customer.get('full_name')
         if name is None:
@@ -36,16 +104,19 @@ def api_get_box(
             'last_activity': customer.get('date_activity'),
             'status': status_to_str(customer['state_id']),
             'sn': extract_sn(name),
-            'onu_level': _get_onu_level(name) if get_onu_level else None,
-            'tasks': _get_tasks('customer', customer['id']) if get_tasks else None
+            'ip': get_customer_ip(customer) if get_ping else None,
+            'ping': None,
+            'onu_level': None,
+            'onu_level_pending': False, # lookup did not finish before deadline
+            'tasks': None
         }
 
-    house_data = api_call('address', 'get_house', f'building_id={id}').get('data')
+    house_data = (await api_call_async('address', 'get_house', f'building_id={id}')).get('data')
     if not house_data:
         return JSONResponse({'status': 'fail', 'detail': 'box not found'}, 404)
 
     house = list(house_data.values())[0]
-    customer_ids: list = api_call('customer', 'get_customers_id', f'house_id={id}').get('data', [])
+    customer_ids: list = (await api_call_async('customer', 'get_customers_id', f'house_id={id}')).get('data', [])
     for customer in exclude_customer_ids:
         if customer in customer_ids:
             customer_ids.remove(customer)
@@ -59,9 +130,19 @@ def api_get_box(
             fetch_customer_ids = customer_ids[:limit]
 
         raw_customers = normalize_items(
-            api_call('customer', 'get_data', f'id={list_to_str(fetch_customer_ids)}')
+            await api_call_async('customer', 'get_data', f'id={list_to_str(fetch_customer_ids)}')
         )
         customers = [c for c in map(_build_customer, raw_customers) if c is not None]
+        lookups = []
+        if get_onu_level:
+            lookups.append(_set_onu_levels(customers))
+        if get_ping:
+            lookups.append(_set_pings(customers))
+        await gather(*lookups)
+        if get_tasks:
+            customers_tasks = await _get_customers_tasks([int(customer['id']) for customer in customers])
+            for customer in customers:
+                customer['tasks'] = customers_tasks.get(int(customer['id']), [])
 
     onu_levels = [c['onu_level'] for c in customers if c['onu_level']]
     avg_onu_level = sum(onu_levels) / len(onu_levels) if onu_levels else None
@@ -75,7 +156,7 @@ def api_get_box(
         'address_id': house['id'],
         'name': house['full_name'],
         'average_onu_level': avg_onu_level,
-        'tasks': _get_tasks('house', id) if get_tasks else None,
+        'tasks': await _get_tasks('house', id) if get_tasks else None,
         'manager_id': house.get('manage_employee_id'),
         'coords': coords,
         'active': not house.get('is_not_use', True),
@@ -1,31 +1,30 @@
 from html import unescape
-from ipaddress import IPv4Address
 
 from fastapi import APIRouter
 from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 
-from api import api_call
+from api import api_call_async
 from utils import list_to_str, to_2gis_link, to_neo_link, normalize_items, extract_sn, remove_sn,\
-    parse_agreement, status_to_str, format_mac
+    parse_agreement, status_to_str, format_mac, get_customer_ip
 
 router = APIRouter(prefix='/customer')
 PHONE_LENGTH = 9
 
 @router.get('/search')
-def api_get_customer_search(query: str):
+async def api_get_customer_search(query: str):
     customer = {}
     customers = []
     search_type = 'default'
 
     if query.isdigit() and len(query) >= PHONE_LENGTH:
-        customer = api_call('customer', 'get_customer_id', f'data_typer=phone&data_value={query}')
+        customer = await api_call_async('customer', 'get_customer_id', f'data_typer=phone&data_value={query}')
         search_type ='phone'
     elif query.isdigit():
-        customer = api_call('customer', 'get_customer_id', f'data_typer=agreement_number&data_value={query}')
+        customer = await api_call_async('customer', 'get_customer_id', f'data_typer=agreement_number&data_value={query}')
         search_type = 'agreement'
     else:
-        customers = list(map(str, api_call('customer', 'get_customers_id', f'name={query}&is_like=1&limit=10')['data']))
+        customers = list(map(str, (await api_call_async('customer', 'get_customers_id', f'name={query}&is_like=1&limit=10'))['data']))
         search_type = 'name'
 
     if 'Id' in customer:
@@ -39,7 +38,7 @@ def api_get_customer_search(query: str):
                 'agreement': parse_agreement(customer['agreement'][0]['number']),
                 'status': status_to_str(customer['state_id'])
             }
-            for customer in normalize_items(api_call('customer', 'get_data', f'id={list_to_str(customers)}'))
+            for customer in normalize_items(await api_call_async('customer', 'get_data', f'id={list_to_str(customers)}'))
         ]
         return {
             'status': 'success',
@@ -56,13 +55,13 @@ def api_get_customer_search(query: str):
 
 # TODO: divide api calls
 @router.get('/{id}')
-def api_get_customer(request: Request, id: int):
-    customer = api_call('customer', 'get_data', f'id={id}').get('data')
+async def api_get_customer(request: Request, id: int):
+    customer = (await api_call_async('customer', 'get_data', f'id={id}')).get('data')
     if customer is None:
         return JSONResponse({'status': 'fail', 'detail': 'customer not found'}, 404)
 
     tariffs = [
-        {'id': int(tariff['id']), 'name': request.app.state.tariffs[tariff['id']]}
+        {'id': int(tariff['id']), 'name': await request.app.state.reference.lookup('tariffs', tariff['id'])}
         for tariff in customer['tariff']['current'] if tariff['id']
     ]
 
@@ -81,11 +80,11 @@ def api_get_customer(request: Request, id: int):
             geodata['2gis_link'] = to_2gis_link(geodata['coord'][0], geodata['coord'][1])
 
 
-    olt = api_call('commutation', 'get_data',
-        f'object_type=customer&object_id={id}&is_finish_data=1')['data']
+    olt = (await api_call_async('commutation', 'get_data',
+        f'object_type=customer&object_id={id}&is_finish_data=1'))['data']
 
     if 'finish' not in olt or olt['finish'].get('object_type') != 'switch' and extract_sn(customer['full_name']) is not None:
-        ont = api_call('device', 'get_ont_data', f'id={extract_sn(customer["full_name"])}')['data']
+        ont = (await api_call_async('device', 'get_ont_data', f'id={extract_sn(customer["full_name"])}'))['data']
         if isinstance(ont, dict):
             olt_id = ont.get('device_id')
         else:
@@ -165,7 +164,7 @@ def api_get_customer(request: Request, id: int):
             'status': status_to_str(customer['state_id']),
             'group': {
                 'id': list(customer['group'].values())[0]['id'],
-                'name': request.app.state.customer_groups[list(customer['group'].values())[0]['id']]
+                'name': await request.app.state.reference.lookup('customer_groups', list(customer['group'].values())[0]['id'])
             } if 'group' in customer else None,
             'phones': [phone['number'] for phone in customer['phone'] if phone['number']],
             'tariffs': tariffs,
@@ -181,7 +180,7 @@ def api_get_customer(request: Request, id: int):
             # ONT
             'olt_id': olt_id,
             'sn': extract_sn(customer['full_name']),
-            'ip': str(IPv4Address(int(list(customer['ip_mac'].values())[0]['ip']))) if list(customer.get('ip_mac', {'': {}}).values())[0].get('ip') else None,
+            'ip': get_customer_ip(customer),
             'mac': format_mac(list(customer.get('ip_mac', {'': {}}).values())[0].get('mac')),
             # 'onu_level': get_ont_data(extract_sn(customer['full_name'])),
 
@@ -218,8 +217,8 @@ def api_get_customer(request: Request, id: int):
 
 
 @router.get('/{id}/name')
-def api_get_customer_name(id: int):
-    customer = api_call('customer', 'get_data', f'id={id}')
+async def api_get_customer_name(id: int):
+    customer = await api_call_async('customer', 'get_data', f'id={id}')
     if 'data' not in customer:
         return JSONResponse({'status': 'fail', 'detail': 'customer not found'}, 404)
     customer = customer['data']
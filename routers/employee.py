@@ -2,35 +2,35 @@ from fastapi import APIRouter
 from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 
-from api import api_call
+from api import api_call_async
 
 router = APIRouter(prefix='/employee')
 
 @router.get('/login')
-def api_get_employee_login(login: str, password: str):
-    result = 'result' in api_call('employee', 'check_pass', f'login={login}&pass={password}')
+async def api_get_employee_login(login: str, password: str):
+    result = 'result' in await api_call_async('employee', 'check_pass', f'login={login}&pass={password}')
     return {
         'status': 'success',
         'correct': result,
-        'id': api_call('employee', 'get_employee_id', f'data_typer=login&data_value={login}').get('id')
+        'id': (await api_call_async('employee', 'get_employee_id', f'data_typer=login&data_value={login}')).get('id')
             if result else None
     }
 
 @router.get('/name/{id}')
-def api_get_employee_name(id: int):
-    data = api_call('employee', 'get_data', f'id={id}')
-    if 'data' not in data:
+async def api_get_employee_name(request: Request, id: int):
+    name = await request.app.state.employees.get_name(id)
+    if name is None:
         return JSONResponse({'status': 'fail', 'detail': 'employee not found'}, 404)
     return {
         'status': 'success',
         'id': id,
-        'name': data['data'][str(id)]['name']
+        'name': name
     }
 
 
 @router.get('/divisions')
-def api_get_employee_divisions(request: Request):
+async def api_get_employee_divisions(request: Request):
     return {
         'status': 'success',
-        'data': request.app.state.divisions
+        'data': request.app.state.reference['divisions']
     }
@@ -3,26 +3,26 @@ from html import unescape
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
-from api import api_call
+from api import api_call_async
 from utils import normalize_items, list_to_str
 
 router = APIRouter(prefix='/inventory')
 
 
 @router.get('')
-def api_get_inventory(
+async def api_get_inventory(
     customer_id: int | None = None,
     get_names: bool = True
 ):
     items = []
     if customer_id is not None:
-        items = normalize_items(api_call('inventory', 'get_inventory_amount', f'location=customer&object_id={customer_id}'))
+        items = normalize_items(await api_call_async('inventory', 'get_inventory_amount', f'location=customer&object_id={customer_id}'))
     else:
         return JSONResponse({'status': 'fail', 'detail': 'no filter provided'}, 422)
 
     named_items = []
     if get_names:
-        names = api_call('inventory', 'get_inventory_catalog', f'id={list_to_str([str(item["inventory_type_id"]) for item in items])}')['data'].values()
+        names = (await api_call_async('inventory', 'get_inventory_catalog', f'id={list_to_str([str(item["inventory_type_id"]) for item in items])}'))['data'].values()
 
         for item in items:
             name = [name for name in names if name['id'] == item['inventory_type_id']][0]
@@ -1,22 +1,23 @@
+from asyncio import gather
 from html import unescape
 
 from fastapi import APIRouter
 from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 
-from api import api_call, set_additional_data
-from utils import remove_sn, get_current_time, status_to_str
+from api import api_call_async, set_additional_data_async
+from utils import remove_sn, get_current_time, status_to_str, str_to_list
 
 router = APIRouter(prefix='/neomobile')
 
 
 @router.get('/login')
-def neomobile_api_get_login(request: Request, phone: str, agreement: str):
-    id = api_call('customer', 'get_customer_id',
+async def neomobile_api_get_login(request: Request, phone: str, agreement: str):
+    id = await api_call_async('customer', 'get_customer_id',
         f'data_typer=agreement_number&data_value={agreement}')
     if 'Id' not in id:
         return JSONResponse({'status': 'fail', 'detail': 'customer not found'}, 404)
-    data = api_call('customer', 'get_data', f'id={id["Id"]}')
+    data = await api_call_async('customer', 'get_data', f'id={id["Id"]}')
     if 'data' not in data:
         return JSONResponse({'status': 'fail', 'detail': 'customer not exists'}, 404)
     data = data['data']
@@ -29,7 +30,7 @@ def neomobile_api_get_login(request: Request, phone: str, agreement: str):
         if tariff['id']:
             tariff_data.append({
                 'id': int(tariff['id']),
-                'name': request.app.state.tariffs[tariff['id']]
+                'name': await request.app.state.reference.lookup('tariffs', tariff['id'])
             })
     return {
         'status': 'success',
@@ -43,8 +44,8 @@ def neomobile_api_get_login(request: Request, phone: str, agreement: str):
     }
 
 @router.get('/customer')
-def neomobile_api_get_customer(request: Request, id: int):
-    data = api_call('customer', 'get_data', f'id={id}')
+async def neomobile_api_get_customer(request: Request, id: int):
+    data = await api_call_async('customer', 'get_data', f'id={id}')
     if 'data' not in data:
         return JSONResponse({'status': 'fail', 'detail': 'customer not found'}, 404)
     data = data['data']
@@ -54,11 +55,11 @@ def neomobile_api_get_customer(request: Request, id: int):
         if tariff['id']:
             tariff_data.append({
                 'id': int(tariff['id']),
-                'name': request.app.state.tariffs[tariff['id']]
+                'name': await request.app.state.reference.lookup('tariffs', tariff['id'])
             })
 
-    tasks = api_call('task', 'get_list',
-        f'customer_id={id}&type_id=37&state_id=18,3,15,17,11,1,10,16,19')['list'].split(',')
+    tasks = (await api_call_async('task', 'get_list',
+        f'customer_id={id}&type_id=37&state_id=18,3,15,17,11,1,10,16,19'))['list'].split(',')
     if tasks == ['']: tasks.clear()
     return {
         # 'status': 'success',
@@ -77,14 +78,14 @@ def neomobile_api_get_customer(request: Request, id: int):
 
 
 @router.post('/task')
-def neomobile_api_post_task(customer_id: int, phone: str, reason: str, comment: str):
-    id = api_call('task', 'add', f'work_typer=37&work_datedo={get_current_time()}&customer_id=\
+async def neomobile_api_post_task(customer_id: int, phone: str, reason: str, comment: str):
+    id = (await api_call_async('task', 'add', f'work_typer=37&work_datedo={get_current_time()}&customer_id=\
 {customer_id}&author_employee_id=184&opis={comment}&deadline_hour=72&employee_id=184&\
-division_id=81')['Id']
-    set_additional_data(17, 28, id, 'Приложение') #TODO: make own appeal type
-    set_additional_data(17, 29, id, phone)
-    set_additional_data(17, 30, id, reason)
-    api_call('task', 'comment_add', f'id={id}&comment={comment}&employee_id=184')
+division_id=81'))['Id']
+    await set_additional_data_async(17, 28, id, 'Приложение') #TODO: make own appeal type
+    await set_additional_data_async(17, 29, id, phone)
+    await set_additional_data_async(17, 30, id, reason)
+    await api_call_async('task', 'comment_add', f'id={id}&comment={comment}&employee_id=184')
 
     return {
         'status': 'success',
@@ -96,19 +97,19 @@ division_id=81')['Id']
     }
 
 @router.post('/task/cancel')
-def neomobile_api_post_task_cancel(id: int):
-    api_call('task', 'change_state', f'id={id}&state_id=10')
+async def neomobile_api_post_task_cancel(id: int):
+    await api_call_async('task', 'change_state', f'id={id}&state_id=10')
     return {
         'status': 'success',
         'id': id
     }
 
 @router.get('/task')
-def neomobile_api_get_task(id: int):
-    data = api_call('task', 'show', f'id={id}')
+async def neomobile_api_get_task(id: int):
+    data = await api_call_async('task', 'show', f'id={id}')
     if 'data' not in data:
         return JSONResponse({'status': 'fail', 'detail': 'task not found'}, 404)
-    comments = api_call('task', 'get_comment', f'task_id={id}')['data']
+    comments = (await api_call_async('task', 'get_comment', f'task_id={id}'))['data']
     data = data['data']
     return {
         'status': 'success',
@@ -132,8 +133,8 @@ def neomobile_api_get_task(id: int):
     }
 
 @router.post('/task/comment')
-def neomobile_api_get_task_comment(id: int, content: str):
-    data = api_call('task', 'comment_add', f'id={id}&comment={content}&employee_id=184')
+async def neomobile_api_get_task_comment(id: int, content: str):
+    data = await api_call_async('task', 'comment_add', f'id={id}&comment={content}&employee_id=184')
     return {
         'status': 'success',
         'id': data['Id'],
@@ -142,11 +143,11 @@ def neomobile_api_get_task_comment(id: int, content: str):
     }
 
 @router.get('/inventory')
-def neomobile_api_get_inventory(request: Request, id: int):
-    data = api_call('inventory', 'get_inventory_amount',
-        f'location=customer&object_id={id}')['data'].values()
-    names = api_call('inventory', 'get_inventory_catalog',
-        f"id={','.join([str(i['inventory_type_id']) for i in data])}")['data'].values()
+async def neomobile_api_get_inventory(request: Request, id: int):
+    data = (await api_call_async('inventory', 'get_inventory_amount',
+        f'location=customer&object_id={id}'))['data'].values()
+    names = (await api_call_async('inventory', 'get_inventory_catalog',
+        f"id={','.join([str(i['inventory_type_id']) for i in data])}"))['data'].values()
     return {
         'status': 'success',
         'id': id,
@@ -161,7 +162,7 @@ def neomobile_api_get_inventory(request: Request, id: int):
                         name for name in names if name['id'] == inventory['catalog_id']
                     ][0]['inventory_section_catalog_id'],
                     'name': [
-                        category['name'] for category in request.app.state.tmc_categories
+                        category['name'] for category in request.app.state.reference['tmc_categories']
                         if category['id'] == [
                             name for name in names
                             if name['id'] == inventory['catalog_id']
@@ -176,16 +177,26 @@ def neomobile_api_get_inventory(request: Request, id: int):
     }
 
 @router.get('/documents')
-def neomobile_api_get_documents(id: int):
-    attachs = list(api_call('attach', 'get', f'object_id={id}&object_type=customer')
-        ['data'].values())
-    tasks = api_call('task', 'get_list', f'customer_id={id}')['list'].split(',')
-    for task in tasks:
-        try:
-            attachs.extend(api_call('attach', 'get', f'object_id={task}&object_type=task')
-                ['data'].values())
-        except AttributeError:
-            continue
+async def neomobile_api_get_documents(id: int):
+    async def _get_attachs(object_type: str, object_id: int | str) -> list[dict]:
+        data = (await api_call_async('attach', 'get', f'object_id={object_id}&object_type={object_type}'))\
+            .get('data')
+        return list(data.values()) if isinstance(data, dict) else []
+
+    async def _get_link(uuid: str) -> str:
+        return (await api_call_async('attach', 'get_file_temporary_link', f'uuid={uuid}'))['data']
+
+    customer_attachs, tasks = await gather(
+        _get_attachs('customer', id),
+        api_call_async('task', 'get_list', f'customer_id={id}')
+    )
+    tasks = str_to_list(tasks['list'])
+    attachs = customer_attachs + [
+        attach
+        for task_attachs in await gather(*[_get_attachs('task', task) for task in tasks])
+        for attach in task_attachs
+    ]
+    links = await gather(*[_get_link(attach['id']) for attach in attachs]) # cached by uuid in api
     return {
         'status': 'success',
         'id': id,
@@ -193,13 +204,12 @@ def neomobile_api_get_documents(id: int):
         'attachs': [
             {
                 'id': attach['id'],
-                'url': api_call('attach', 'get_file_temporary_link',
-                    f'uuid={attach["id"]}')['data'],
+                'url': link,
                 'name': attach['internal_filepath'] if '.' in attach['internal_filepath'] else
                     attach['internal_filepath'] + '.png',
                 'extension': attach['internal_filepath'].split('.')[1].lower()
                     if '.' in attach['internal_filepath'] else 'png',
                 'created_at': attach['date_add']
-            } for attach in attachs
+            } for attach, link in zip(attachs, links)
         ]
     }
@@ -1,19 +1,42 @@
-from fastapi import APIRouter
+from json import dumps
+from time import time
+
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from api import api_call
-from ont import search_ont, reset_ont, get_ont_summary, toggle_catv
+from api import api_call_async
+from olt_scheduler import scheduler, sweep_ont_summary, OltBusyError
+from ont import search_ont, reset_ont, get_ont_summary, toggle_catv, ont_key, PRIORITY_BULK
+from ont_state import MAX_AGE
+from ping import ping_many, PING_TIMEOUT
 
 router = APIRouter(prefix='/ont')
+MAX_PING_IPS = 256 # max targets of one /ont/ping call, more than customers of any box
+MAX_PING_COUNT = 10 # max echo requests per target
+MAX_PING_TIMEOUT = 5 # max wait (s) for every reply
 
 @router.get('')
-def api_get_ont(request: Request, olt_id: int, sn: str):
-    olt = [olt for olt in request.app.state.olts if olt['id'] == olt_id]
-    if not olt:
+async def api_get_ont(request: Request, olt_id: int, sn: str, cached: bool = False, max_age: float = MAX_AGE):
+    olt = await request.app.state.reference.lookup('olts', olt_id)
+    if olt is None:
         return JSONResponse({'status': 'fail', 'detail': 'olt not found'}, 404)
-    olt = olt[0]
-    res = search_ont(sn, olt['host'])
+    if cached:
+        state = request.app.state.ont_states.get(sn)
+        if state is not None and state.olt_id == olt_id and time() - state.updated_at <= max_age:
+            return {
+                'status': 'success',
+                'sn': sn,
+                'olt': olt,
+                'data': state.to_dict(),
+                'cached': True,
+                'age': round(time() - state.updated_at, 1)
+            }
+    try:
+        res = await scheduler.run(olt['host'], search_ont, sn, olt['host'])
+    except OltBusyError as e:
+        return JSONResponse({'status': 'fail', 'detail': str(e)}, 503)
     if res is None:
         return {'status': 'fail', 'detail': 'ont not found'}
     if res[1] is not None:
@@ -22,25 +45,69 @@ def api_get_ont(request: Request, olt_id: int, sn: str):
         'status': 'success',
         'sn': sn,
         'olt': olt,
-        'data': res[0]
+        'data': res[0],
+        'cached': False,
+        'age': 0
     }
 
 @router.post('/{fibre}/{service}/{port}/{id}/restart')
-def api_post_ont_restart(fibre: int, service: int, port: int, id: int, host: str):
-    return reset_ont(host, id, {'fibre': fibre, 'service': service, 'port': port})
+async def api_post_ont_restart(fibre: int, service: int, port: int, id: int, host: str):
+    interface = {'fibre': fibre, 'service': service, 'port': port}
+    try:
+        return await scheduler.run_write(host, ont_key(host, id, interface), reset_ont, host, id, interface)
+    except OltBusyError as e:
+        return JSONResponse({'status': 'fail', 'detail': str(e)}, 503)
 
 @router.post('/{fibre}/{service}/{port}/{id}/catv/{catv_id}/toggle')
-def api_post_ont_catv_toggle(fibre: int, service: int, port: int, id: int, catv_id: int, state: bool, host: str):
-    result = toggle_catv(host, id, catv_id, state, {'fibre': fibre, 'service': service, 'port': port})
+async def api_post_ont_catv_toggle(fibre: int, service: int, port: int, id: int, catv_id: int, state: bool, host: str):
+    interface = {'fibre': fibre, 'service': service, 'port': port}
+    try:
+        result = await scheduler.run_write(host, ont_key(host, id, interface), toggle_catv, host, id, catv_id, state,
+            interface)
+    except OltBusyError as e:
+        return JSONResponse({'status': 'fail', 'detail': str(e)}, 503)
     return JSONResponse(result[0], result[1])
 
 @router.get('/summary')
-def api_get_ont_summary(host: str, fibre: int, service: int, port: int):
-    return get_ont_summary(host, {'fibre': fibre, 'service': service, 'port': port})
+async def api_get_ont_summary(host: str, fibre: int, service: int, port: int):
+    try:
+        return await scheduler.run(host, get_ont_summary, host, {'fibre': fibre, 'service': service, 'port': port},
+            priority=PRIORITY_BULK)
+    except OltBusyError as e:
+        return JSONResponse({'status': 'fail', 'detail': str(e)}, 503)
+
+@router.get('/sweep')
+async def api_get_ont_sweep(host: str, frame: int = 0, slots: str | None = None):
+    try:
+        slot_list = [int(slot) for slot in slots.split(',')] if slots else None
+    except ValueError:
+        return JSONResponse({'status': 'fail', 'detail': 'slots must be comma-separated numbers'}, 422)
+    return StreamingResponse(
+        (dumps(result, ensure_ascii=False, default=str) + '\n' async for result in sweep_ont_summary(host, frame, slot_list)),
+        media_type='application/x-ndjson'
+    )
+
+@router.get('/ping')
+async def api_get_ont_ping(
+    ips: str,
+    count: int = Query(1, ge=1, le=MAX_PING_COUNT),
+    timeout: float = Query(PING_TIMEOUT, ge=0.1, le=MAX_PING_TIMEOUT)
+):
+    ip_list = [ip.strip() for ip in ips.split(',') if ip.strip()]
+    if not ip_list:
+        return JSONResponse({'status': 'fail', 'detail': 'no ips'}, 422)
+    if len(ip_list) > MAX_PING_IPS:
+        return JSONResponse({'status': 'fail', 'detail': f'too many ips (max {MAX_PING_IPS})'}, 422)
+    try:
+        results = await run_in_threadpool(ping_many, ip_list, count, timeout)
+    except OSError as e:
+        print(f'error ping: {e.__class__.__name__}: {e}')
+        return JSONResponse({'status': 'fail', 'detail': str(e)}, 500)
+    return {'status': 'success', 'results': results}
 
 @router.post('/rewrite_sn')
-def api_post_ont_rewrite_sn(customer_id: int, ls: int, sn: str):
-    res = api_call(
+async def api_post_ont_rewrite_sn(customer_id: int, ls: int, sn: str):
+    res = await api_call_async(
         'customer', 'mark_add',
         f'nogi=bogi&mark_id=1&customer_id={customer_id}&_command=attach_onu&_onu_serial={sn}&'
         f'_contract_number={ls}',
@@ -51,8 +118,8 @@ def api_post_ont_rewrite_sn(customer_id: int, ls: int, sn: str):
     return {'status': 'success', 'message': res.get('msg')}
 
 @router.post('/rewrite_mac')
-def api_post_rewrite_mac(customer_id: int, ls: int):
-    res = api_call(
+async def api_post_rewrite_mac(customer_id: int, ls: int):
+    res = await api_call_async(
         'customer', 'mark_add',
         f'nogi=bogi&mark_id=1&customer_id={customer_id}&_command=renew_mac_address&'
         f'_userside_customer_id={customer_id}&_contract_number={ls}'
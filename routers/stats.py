@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.requests import Request
+
+from api import client, coalescer, cache
+from ont import pool, ont_writes
+from olt_scheduler import scheduler
+
+router = APIRouter(prefix='/stats')
+
+@router.get('/userside')
+async def api_get_userside_stats(request: Request):
+    return {
+        'status': 'success',
+        'pool': client.stats(),
+        'coalescing': coalescer.stats(),
+        'cache': cache.stats(),
+        'employees': request.app.state.employees.stats(),
+        'reference': request.app.state.reference.stats()
+    }
+
+@router.get('/olt')
+async def api_get_olt_stats(request: Request):
+    return {
+        'status': 'success',
+        'sessions': pool.stats(),
+        'queues': scheduler.stats(),
+        'ont_writes': len(ont_writes),
+        'ont_states': request.app.state.ont_states.stats()
+    }
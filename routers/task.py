@@ -1,101 +1,129 @@
+from asyncio import gather
 from html import unescape
 
 from fastapi import APIRouter
+from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 
-from api import api_call, set_additional_data
-from utils import get_current_time, normalize_items, str_to_list, list_to_str, remove_sn
+from api import api_call_async, set_additional_data_async
+from utils import get_current_time, normalize_items, str_to_list, list_to_str, remove_sn, chunks
 
 router = APIRouter(prefix='/task')
+CUSTOMER_CHUNK = 100 # customer ids per customer get_data call
+
+def _get_employee_ids(task: dict) -> set[int]:
+    """Get ids of task author and comment authors"""
+    ids = {int(comment['employee_id']) for comment in task.get('comments', {}).values() if comment.get('employee_id')}
+    if task.get('author_employee_id'):
+        ids.add(int(task['author_employee_id']))
+    return ids
+
+async def _get_customers(ids: set[int]) -> dict[int, dict]:
+    """Get customers data with bulk calls (CUSTOMER_CHUNK ids per call)"""
+    results = await gather(*[
+        api_call_async('customer', 'get_data', f'id={list_to_str(chunk)}')
+        for chunk in chunks(sorted(ids), CUSTOMER_CHUNK)
+    ])
+    return {int(customer['id']): customer for result in results for customer in normalize_items(result)}
+
+async def _enrich_tasks(request: Request, tasks: list[dict], get_employee_names: bool) -> list[dict]:
+    """Build tasks response. All customers and employee names of tasks are resolved in bulk first"""
+    customer_ids = {int(task['customer'][0]) for task in tasks if task.get('customer')}
+    employee_ids = set().union(*map(_get_employee_ids, tasks)) if get_employee_names else set()
+    customers, names = await gather(
+        _get_customers(customer_ids),
+        request.app.state.employees.get_names(employee_ids)
+    )
+    return [
+        _build_task(task, customers.get(int(task['customer'][0])) if task.get('customer') else None, names)
+        for task in tasks
+    ]
+
+def _build_task(task: dict, customer: dict | None, names: dict[int, str | None]) -> dict:
+    """Build task response from task, its customer and employee names"""
+    return {
+        'id': task['id'],
+        'comments': [
+            {
+                'id': comment['id'],
+                'created_at': comment['dateAdd'],
+                'author': {
+                    'id': comment['employee_id'],
+                    'name': names.get(int(comment['employee_id']))
+                } if comment.get('employee_id') else None,
+                'content': unescape(comment['comment'])
+            } for comment in task.get('comments', {}).values()
+        ],
+        'timestamps': {
+            'created_at': task['date'].get('create'),
+            'planned_at': task['date'].get('todo'),
+            'updated_at': task['date'].get('update'),
+            'completed_at': task['date'].get('complete'),
+            'deadline': task['date'].get('runtime_individual_hour')
+        },
+        'addata': {
+            'reason': task['additional_data'].get('30', {}).get('value'),
+            'solve': task['additional_data'].get('36', {}).get('value'),
+            'appeal': {
+                'phone': task['additional_data'].get('29', {}).get('value'),
+                'type': task['additional_data'].get('28', {}).get('value')
+            },
+            'cost': float(task['additional_data'].get('26', {}).get('value'))
+                if task['additional_data'].get('26', {}).get('value') else None
+        } if task['type']['id'] == 37 else {
+            'reason': task['additional_data'].get('33', {}).get('value'),
+            'info': task['additional_data'].get('34', {}).get('value'),
+            'appeal': {
+                'phone': task['additional_data'].get('29', {}).get('value'),
+                'type': task['additional_data'].get('28', {}).get('value')
+            },
+        } if task['type']['id'] == 38 else {
+            'coord': list(map(float, task['additional_data']['7']['value'].split(',')))
+                if '7' in task['additional_data'] else None,
+            'tariff': task['additional_data'].get('25', {}).get('value'),
+            'connect_type': task['additional_data'].get('27', {}).get('value')
+        } if task['type']['id'] == 28 else None,
+        'type': {
+            'id': task['type']['id'],
+            'name': task['type']['name']
+        },
+        'author': {
+            'id': task['author_employee_id'],
+            'name': names.get(int(task['author_employee_id']))
+        },
+        'status': {
+            'id': task['state']['id'],
+            'name': task['state']['name'],
+            'system_id': task['state']['system_role']
+        } if task.get('state') else None,
+        'address': {
+            'id': task['address'].get('addressId'),
+            'name': task['address'].get('text'),
+            'apartment': unescape(task['address']['apartment'])
+                if task['address'].get('apartment') else None
+        },
+        'customer': {
+            'id': customer['id'],
+            'name': remove_sn(customer['full_name'])
+        } if customer else None,
+        'employees': list(task.get('staff', {}).get('employee', {}).values()), # TODO: get employees names
+        'divisions': list(task.get('staff', {}).get('division', {}).values()), # TODO: get divisions names
+    }
 
 @router.get('/{id}')
-def api_get_task(id: int, get_employee_names: bool = True):
-    task = api_call('task', 'show', f'id={id}').get('data')
+async def api_get_task(request: Request, id: int, get_employee_names: bool = True):
+    task = (await api_call_async('task', 'show', f'id={id}')).get('data')
     if task is None:
         return JSONResponse({'status': 'fail', 'detail': 'task not found'}, 404)
 
-    customer = api_call('customer', 'get_data', f'id={task["customer"][0]}')['data'] if 'customer' in task else None
-
-
     return {
         'status': 'success',
-        'data': {
-            'id': id,
-            'comments': [
-                {
-                    'id': comment['id'],
-                    'created_at': comment['dateAdd'],
-                    'author': {
-                        'id': comment['employee_id'],
-                        'name': (api_call('employee', 'get_data', f'id={comment["employee_id"]}')
-                                .get('data', {}).get(str(comment['employee_id']), {}).get('name')
-                                if get_employee_names else None)
-                    } if comment.get('employee_id') else None,
-                    'content': unescape(comment['comment'])
-                } for comment in task.get('comments', {}).values()
-            ],
-            'timestamps': {
-                'created_at': task['date'].get('create'),
-                'planned_at': task['date'].get('todo'),
-                'updated_at': task['date'].get('update'),
-                'completed_at': task['date'].get('complete'),
-                'deadline': task['date'].get('runtime_individual_hour')
-            },
-            'addata': {
-                'reason': task['additional_data'].get('30', {}).get('value'),
-                'solve': task['additional_data'].get('36', {}).get('value'),
-                'appeal': {
-                    'phone': task['additional_data'].get('29', {}).get('value'),
-                    'type': task['additional_data'].get('28', {}).get('value')
-                },
-                'cost': float(task['additional_data'].get('26', {}).get('value'))
-                    if task['additional_data'].get('26', {}).get('value') else None
-            } if task['type']['id'] == 37 else {
-                'reason': task['additional_data'].get('33', {}).get('value'),
-                'info': task['additional_data'].get('34', {}).get('value'),
-                'appeal': {
-                    'phone': task['additional_data'].get('29', {}).get('value'),
-                    'type': task['additional_data'].get('28', {}).get('value')
-                },
-            } if task['type']['id'] == 38 else {
-                'coord': list(map(float, task['additional_data']['7']['value'].split(',')))
-                    if '7' in task['additional_data'] else None,
-                'tariff': task['additional_data'].get('25', {}).get('value'),
-                'connect_type': task['additional_data'].get('27', {}).get('value')
-            } if task['type']['id'] == 28 else None,
-            'type': {
-                'id': task['type']['id'],
-                'name': task['type']['name']
-            },
-            'author': {
-                'id': task['author_employee_id'],
-                'name': (api_call('employee', 'get_data', f'id={task["author_employee_id"]}')
-                    .get('data', {}).get(str(task['author_employee_id']), {}).get('name')
-                    if get_employee_names else None)
-            },
-            'status': {
-                'id': task['state']['id'],
-                'name': task['state']['name'],
-                'system_id': task['state']['system_role']
-            } if task.get('state') else None,
-            'address': {
-                'id': task['address'].get('addressId'),
-                'name': task['address'].get('text'),
-                'apartment': unescape(task['address']['apartment'])
-                    if task['address'].get('apartment') else None
-            },
-            'customer': {
-                'id': customer['id'],
-                'name': remove_sn(customer['full_name'])
-            } if customer else None,
-            'employees': list(task.get('staff', {}).get('employee', {}).values()), # TODO: get employees names
-            'divisions': list(task.get('staff', {}).get('division', {}).values()), # TODO: get divisions names
-        }
+        'data': (await _enrich_tasks(request, [task], get_employee_names))[0]
     }
 
 @router.get('/{id}/comments', deprecated=True)
-def api_get_task_comments(id: int):
-    comments = api_call('task', 'get_comment', f'id={id}')['data']
+async def api_get_task_comments(id: int):
+    comments = (await api_call_async('task', 'get_comment', f'id={id}'))['data']
     return {
         'status': 'success',
         'id': id,
@@ -108,8 +136,8 @@ def api_get_task_comments(id: int):
     }
 
 @router.post('/{id}/comment')
-def api_post_task_comment(id: int, content: str, author: int | None = None):
-    comment_id = api_call('task', 'comment_add', f'id={id}&comment={content}{f"&employee_id={author}" if author else ""}')['Id']
+async def api_post_task_comment(id: int, content: str, author: int | None = None):
+    comment_id = (await api_call_async('task', 'comment_add', f'id={id}&comment={content}{f"&employee_id={author}" if author else ""}'))['Id']
     return {
         'status': 'success',
         'id': comment_id
@@ -117,7 +145,7 @@ def api_post_task_comment(id: int, content: str, author: int | None = None):
 
 
 @router.post('')
-def api_post_task(
+async def api_post_task(
     type: int,
 
     customer_id: int | None = None,
@@ -160,30 +188,31 @@ def api_post_task(
     if customer_id:
         params.append(f'customer_id={customer_id}')
 
-    id = api_call('task', 'add', '&'.join(params))['Id']
+    id = (await api_call_async('task', 'add', '&'.join(params)))['Id']
 
     if type in (37, 46, 53):
-        set_additional_data(17, 30, id, reason)
-        set_additional_data(17, 29, id, appeal_phone)
-        set_additional_data(17, 28, id, appeal_type)
+        await set_additional_data_async(17, 30, id, reason)
+        await set_additional_data_async(17, 29, id, appeal_phone)
+        await set_additional_data_async(17, 28, id, appeal_type)
     elif type == 60:
-        set_additional_data(17, 29, id, appeal_phone)
+        await set_additional_data_async(17, 29, id, appeal_phone)
     elif type == 38:
-        set_additional_data(17, 30, id, reason)
-        set_additional_data(17, 28, id, appeal_type)
+        await set_additional_data_async(17, 30, id, reason)
+        await set_additional_data_async(17, 28, id, appeal_type)
     elif type == 48:
-        set_additional_data(17, 30, id, reason)
-        set_additional_data(17, 29, id, appeal_phone)
+        await set_additional_data_async(17, 30, id, reason)
+        await set_additional_data_async(17, 29, id, appeal_phone)
 
     if description:
-        api_call('task', 'comment_add', f'id={id}&comment={description}&employee_id={author_id}')
+        await api_call_async('task', 'comment_add', f'id={id}&comment={description}&employee_id={author_id}')
     return {
         'status': 'success',
         'id': id
     }
 
 @router.get('')
-def api_get_tasks(
+async def api_get_tasks(
+    request: Request,
     customer_id: int | None = None,
     get_data: bool = True,
     get_employee_names: bool = True,
@@ -193,90 +222,21 @@ def api_get_tasks(
 ):
     tasks = []
     if customer_id is not None:
-        tasks = list(map(int, str_to_list(api_call('task', 'get_list', f'customer_id={customer_id}&order_by=date_add&{f"&limit={limit}" if limit else ""}{f"&offset={skip}" if skip else ""}')['list'])))
+        tasks = list(map(int, str_to_list((await api_call_async('task', 'get_list', f'customer_id={customer_id}&order_by=date_add&{f"&limit={limit}" if limit else ""}{f"&offset={skip}" if skip else ""}'))['list'])))
         if (limit or skip) and get_count:
-            tasks_count = api_call('task', 'get_list', f'customer_id={customer_id}')['count']
+            tasks_count = (await api_call_async('task', 'get_list', f'customer_id={customer_id}'))['count']
         else:
             tasks_count = len(tasks)
     else:
         return JSONResponse({'status': 'fail', 'detail': 'no filters provided'}, 422)
 
     tasks_data = []
-    if get_data:
-        for task in normalize_items(api_call('task', 'show', f'id={list_to_str(tasks)}')):
-            customer = api_call('customer', 'get_data', f'id={task["customer"][0]}')['data'] if 'customer' in task else None
-            tasks_data.append({
-                'id': task['id'],
-                'comments': [
-                    {
-                        'id': comment['id'],
-                        'created_at': comment['dateAdd'],
-                        'author': {
-                            'id': comment['employee_id'],
-                            'name': (api_call('employee', 'get_data', f'id={comment["employee_id"]}')
-                                    .get('data', {}).get(str(comment['employee_id']), {}).get('name')
-                                    if get_employee_names else None)
-                        } if comment.get('employee_id') else None,
-                        'content': unescape(comment['comment'])
-                    } for comment in task.get('comments', {}).values()
-                ],
-                'timestamps': {
-                    'created_at': task['date'].get('create'),
-                    'planned_at': task['date'].get('todo'),
-                    'updated_at': task['date'].get('update'),
-                    'completed_at': task['date'].get('complete'),
-                    'deadline': task['date'].get('runtime_individual_hour')
-                },
-                'addata': {
-                    'reason': task['additional_data'].get('30', {}).get('value'),
-                    'solve': task['additional_data'].get('36', {}).get('value'),
-                    'appeal': {
-                        'phone': task['additional_data'].get('29', {}).get('value'),
-                        'type': task['additional_data'].get('28', {}).get('value')
-                    },
-                    'cost': float(task['additional_data'].get('26', {}).get('value'))
-                        if task['additional_data'].get('26', {}).get('value') else None
-                } if task['type']['id'] == 37 else {
-                    'reason': task['additional_data'].get('33', {}).get('value'),
-                    'info': task['additional_data'].get('34', {}).get('value'),
-                    'appeal': {
-                        'phone': task['additional_data'].get('29', {}).get('value'),
-                        'type': task['additional_data'].get('28', {}).get('value')
-                    },
-                } if task['type']['id'] == 38 else {
-                    'coord': list(map(float, task['additional_data']['7']['value'].split(',')))
-                        if '7' in task['additional_data'] else None,
-                    'tariff': task['additional_data'].get('25', {}).get('value'),
-                    'connect_type': task['additional_data'].get('27', {}).get('value')
-                } if task['type']['id'] == 28 else None,
-                'type': {
-                    'id': task['type']['id'],
-                    'name': task['type']['name']
-                },
-                'author': {
-                    'id': task['author_employee_id'],
-                    'name': (api_call('employee', 'get_data', f'id={task["author_employee_id"]}')
-                        .get('data', {}).get(str(task['author_employee_id']), {}).get('name')
-                        if get_employee_names else None)
-                },
-                'status': {
-                    'id': task['state']['id'],
-                    'name': task['state']['name'],
-                    'system_id': task['state']['system_role']
-                } if task.get('state') else None,
-                'address': {
-                    'id': task['address'].get('addressId'),
-                    'name': task['address'].get('text'),
-                    'apartment': unescape(task['address']['apartment'])
-                        if task['address'].get('apartment') else None
-                },
-                'customer': {
-                    'id': customer['id'],
-                    'name': remove_sn(customer['full_name'])
-                } if customer else None,
-                'employees': list(task.get('staff', {}).get('employee', {}).values()),
-                'divisions': list(task.get('staff', {}).get('division', {}).values()),
-            })
+    if get_data and tasks:
+        tasks_data = await _enrich_tasks(
+            request,
+            list(normalize_items(await api_call_async('task', 'show', f'id={list_to_str(tasks)}'))),
+            get_employee_names
+        )
 
     return {
         'status': 'success',
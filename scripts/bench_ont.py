@@ -0,0 +1,86 @@
+"""ont.py end-to-end benchmark against simulated OLT
+
+Starts scripts/fake_olt.py server in-process and measures search_ont and get_ont_summary latency,
+sequentially and with concurrent callers, then prints session pool and OLT session stats.
+ont.py imports config.py, so it must be importable (SSH_USER/SSH_PASSWORD can be anything).
+
+Usage (from repo root): python scripts/bench_ont.py [--latency 0.05] [--concurrency 8] [--requests 50]
+"""
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from random import Random
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import ont # noqa: E402
+from fake_olt import Olt, FakeOltServer # noqa: E402
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, max(0, round(percent / 100 * len(values) + 0.5) - 1))]
+
+def measure(title: str, calls: list, concurrency: int):
+    """Run calls (no-arg functions) with `concurrency` threads and print latency percentiles"""
+    def timed(call) -> tuple[float, bool]:
+        started = perf_counter()
+        result = call()
+        result = result[0] if isinstance(result, tuple) else result
+        return perf_counter() - started, 'detail' in result and result.get('status') != 'offline'
+
+    started = perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(timed, calls))
+    duration = perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    print(f'{title:<36} {len(results):>5} {sum(failed for _, failed in results):>6} '
+          f'{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} '
+          f'{latencies[-1] * 1000:>8.1f} {len(results) / duration:>8.1f}')
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated delay of every OLT command (s)')
+    parser.add_argument('--max-sessions', type=int, default=4, help='OLT limit of simultaneous sessions')
+    parser.add_argument('--requests', type=int, default=50, help='calls per concurrent phase')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    olt = Olt('JBI-Grand', [1, 2], 16, 32, args.seed)
+    server = FakeOltServer(olt, port=0, latency=args.latency, max_sessions=args.max_sessions).start()
+    host = f'127.0.0.1:{server.port}'
+    rnd = Random(args.seed)
+    sns = list(olt.onts)
+    ports = [{'fibre': frame, 'service': slot, 'port': port} for frame, slot, port in olt.by_port]
+    print(f'fake OLT on {host}: {len(sns)} ONTs, {len(ports)} ports, {args.latency * 1000:.0f} ms per command, '
+          f'{args.max_sessions} sessions max')
+
+    def search():
+        return ont.search_ont(rnd.choice(sns), host)
+
+    def summary():
+        return ont.get_ont_summary(host, rnd.choice(ports))
+
+    print(f'{"phase":<36} {"calls":>5} {"errors":>6} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8} {"calls/s":>8}')
+    measure('search_ont (first, connect)', [search], 1)
+    measure('search_ont sequential', [search] * 10, 1)
+    measure(f'search_ont x{args.concurrency}', [search] * args.requests, args.concurrency)
+    measure('get_ont_summary sequential', [summary] * 10, 1)
+    measure(f'get_ont_summary x{args.concurrency}', [summary] * args.requests, args.concurrency)
+    calls = [rnd.choice((search, summary)) for _ in range(args.requests)]
+    measure(f'mixed x{args.concurrency}', calls, args.concurrency)
+
+    print(f'\npool: {ont.pool.stats()[host]}')
+    print(f'OLT sessions: {server.total_sessions} opened, {server.rejected} rejected')
+    ont.pool.close()
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
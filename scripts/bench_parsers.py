@@ -0,0 +1,275 @@
+"""OLT output parsers regression check and benchmark
+
+Splits ont_commands.txt (real OLT transcripts) into cases, checks results of `_parse_*` functions
+from ont.py on them, then measures parses/sec and peak memory per parse, including synthetic
+full-port cases (128 ONTs). Incremental parsers are also checked with output fed in small chunks.
+
+Usage (from repo root): python scripts/bench_parsers.py [--check-only] [--filter TEXT]
+"""
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from timeit import Timer
+from tracemalloc import start, stop, reset_peak, get_traced_memory
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import ont # noqa: E402
+
+INTERFACE = {'fibre': 0, 'service': 1, 'port': 0}
+SUMMARY_ONTS = 128 # ONTs in synthetic port summary (max for GPON port)
+FEED_CHUNK = 61 # chunk size for incremental parsers checks, odd to split lines and pagination anywhere
+
+# outputs missing in transcript, made by Huawei format
+SYNTHETIC_CASES = {
+    'display board': '\n'.join([
+        '  -------------------------------------------------------------------------',
+        '  SlotID  BoardName  Status          SubType0 SubType1    Online/Offline',
+        '  -------------------------------------------------------------------------',
+        '  0       H901GPHF   Normal',
+        '  1       H901GPHF   Failed',
+        '  2',
+        '  8       H901MPLA   Active_normal   CPCF',
+        '  9       H901MPLA   Standby_normal  CPCF',
+        '  10      H901PILA   Normal',
+        '  14      H901XGHD   Normal',
+        '  -------------------------------------------------------------------------',
+        'JBI-Grand(config)#'
+    ]),
+    'display ont info summary (port does not exist)': "  % Parameter error, the error locates at '^'\n\nJBI-Grand(config)#"
+}
+
+CHECKS = [ # (case title, parser, expected result)
+    ('display ont info by sn (incorrect sn)', ont._parse_basic_info, ValueError('ONT not found')),
+    ('display ont info by sn', ont._parse_basic_info, {
+        'interface': {'name': '0/2/13', 'fibre': 0, 'service': 2, 'port': 13},
+        'ont_id': 5,
+        'online': False,
+        'mem_load': None,
+        'cpu_load': None,
+        'temp': None,
+        'ip': None,
+        'last_down_cause': None,
+        'last_down': None,
+        'last_up': None,
+        'uptime': None,
+        '_catv_ports': 2
+    }),
+    ('display ont optical info (ont is not online)', ont._parse_optical_info,
+        {'status': 'fail', 'detail': 'ONT is not online'}),
+    ('display ont optical info', ont._parse_optical_info, {
+        'rx': -24.68,
+        'tx': 2.05,
+        'temp': 44,
+        'bias': 8,
+        'olt_rx': -28.87,
+        'prec': 3.0,
+        'catv_rx': None,
+        'voltage': 3.22,
+        'vendor': {'name': 'HUAWEI', 'rev': None, 'pn': 'HW-BOB-0002', 'sn': '1505E1263456C'}
+    }),
+    ('display ont catv port state info', ont._parse_output, ({}, [[
+        {'ONT-ID': 1, 'ONT-port-ID': 1, 'ONT-Port-type': 'CATV', 'LinkState': True, 'TxPower-(dBmV)': None}
+    ]])),
+    ('display ont eth port state info (ont port does not exists)', ont._parse_eth_ports_status, []),
+    ('display ont eth port state info', ont._parse_eth_ports_status, [{'id': 1, 'status': False, 'speed': None}]),
+    ('display ont catv port attribute info (ont port does not exists)', ont._parse_port_status, False),
+    ('display ont catv port attribute info', ont._parse_port_status, True),
+    ('display ont eth port attribute info', ont._parse_output, ({}, [[{
+        'ONT': 1,
+        'ONT-port': 1,
+        'ONT-port-type': 'ETH',
+        'Auto-neg': True,
+        'Speed-(Mbps)': 'auto',
+        'Duplex': 'auto',
+        'Port-switch': True,
+        'Flow-control': False,
+        'Native-VLAN': 1,
+        'Priority': 0
+    }]])),
+    ('get mac address (incorrect service port)', ont._parse_mac, None),
+    ('get mac address', ont._parse_mac, '9c:37:f4:34:80:75'),
+    ('get service port (incorrect ont id)', lambda raw: ont._parse_service_port(raw, INTERFACE), None),
+    ('get service port', lambda raw: ont._parse_service_port(raw, INTERFACE), 377),
+    ('display board', ont._parse_boards, [0, 14]),
+    ('display ont info summary (port does not exist)', ont._parse_onts_info,
+        ({'status': 'fail', 'detail': 'port does not exist'}, None, None))
+]
+
+
+def load_cases(path: Path) -> dict[str, str]:
+    """Split transcript into {comment: command output} and add SYNTHETIC_CASES
+
+    Command echo line is dropped like in _read_output.
+    """
+    cases = dict(SYNTHETIC_CASES)
+    title, lines = None, []
+    for line in path.read_text().splitlines() + ['#']:
+        if not line.startswith('#'):
+            lines.append(line)
+            continue
+        if title is not None:
+            if lines and '#' in lines[0]: # prompt with command
+                lines = lines[1:]
+            cases[title] = '\n'.join(lines)
+        title, lines = line.lstrip('# ').strip(), []
+    return cases
+
+def synthetic_summary(onts: int) -> str:
+    """`display ont info summary` output for port with `onts` ONTs (every 4th is offline)"""
+    divider = '  ' + '-' * 77
+    online = [id % 4 != 3 for id in range(onts)]
+    lines = [
+        divider,
+        f'  In port 0/1/0, the total of ONTs are: {onts}, online: {sum(online)}',
+        divider,
+        '  ONT  Run     Last                Last                Last',
+        '  ID   State   UpTime              DownTime            DownCause',
+        divider
+    ]
+    lines += [
+        f'  {id:<4} {"online" if online[id] else "offline":<7} 2024-10-01 10:00:00 2024-09-30 09:00:00 dying-gasp'
+        for id in range(onts)
+    ]
+    lines += [
+        divider,
+        '  ONT        SN        Type          Distance Rx/Tx power  Description',
+        '  ID                                    (m)      (dBm)',
+        divider
+    ]
+    lines += [
+        f'  {id:<4} {4857544300000000 + id:<16}  {"HG8245H":<12}  {1000 + id if online[id] else "-":<7}  '
+        f'{"-21.50/2.10" if online[id] else "-/-":<12} ONT_NO_DESCRIPTION'
+        for id in range(onts)
+    ]
+    return '\n'.join(lines + [divider])
+
+def synthetic_service_ports(cases: dict[str, str], rows: int) -> str:
+    """Service port table from transcript with its single row repeated `rows` times
+
+    Output is cleaned up the same way as in _parse_service_port.
+    """
+    raw = cases['get service port'].replace('0/1 /0', '0/ 1/ 0').replace(' Switch-Oriented Flow List\n', '')
+    lines = raw.splitlines()
+    row = next(line for line in lines if line.strip().startswith('377'))
+    index = lines.index(row)
+    return '\n'.join(lines[:index] + [row.replace('377', f'{i:>3}', 1) for i in range(rows)] + lines[index + 1:])
+
+def paginated(raw: str) -> str:
+    """Output with "---- More" in the middle, as _read_output receives it after answering with space"""
+    lines = raw.split('\n')
+    middle = len(lines) // 2
+    return '\n'.join(lines[:middle] + [ont.PAGINATION + '\x1b[37D' + lines[middle]] + lines[middle + 1:])
+
+def feed_chunks(parser, raw: str, size: int = FEED_CHUNK):
+    """Feed output to incremental parser in chunks (like _read_output does) and return its result"""
+    for i in range(0, len(raw), size):
+        parser.feed(raw[i:i + size])
+    parser.close()
+    return parser.result()
+
+def summary_chunks(raw: str):
+    return feed_chunks(ont.OntSummaryParser(), paginated(raw), 1024)
+
+def check(cases: dict[str, str]) -> int:
+    """Run CHECKS and synthetic checks, print failures and return their count"""
+    failures = 0
+    for title, parser, expected in CHECKS:
+        try:
+            result = parser(cases[title])
+        except Exception as e:
+            result = e
+        if isinstance(expected, Exception):
+            ok = type(result) is type(expected) and str(result) == str(expected)
+        else:
+            ok = result == expected
+        if not ok:
+            failures += 1
+            print(f'FAIL {title}\n  expected: {expected!r}\n  got:      {result!r}')
+
+    online, offline, onts = ont._parse_onts_info(synthetic_summary(SUMMARY_ONTS))
+    expected_online = sum(id % 4 != 3 for id in range(SUMMARY_ONTS))
+    if (online, offline, len(onts)) != (expected_online, SUMMARY_ONTS - expected_online, SUMMARY_ONTS) or onts[3] != {
+        'id': 3, 'status': False, 'uptime': '2024-10-01 10:00:00', 'downtime': '2024-09-30 09:00:00',
+        'cause': 'dying-gasp', 'sn': '4857544300000003', 'name': 'ONT_NO_DESCRIPTION', 'distance': None,
+        'rx': None, 'tx': None
+    }:
+        failures += 1
+        print(f'FAIL synthetic summary\n  got: {online}, {offline}, {onts[:4]!r}')
+
+    _, tables = ont._parse_output(synthetic_service_ports(cases, SUMMARY_ONTS))
+    if [row['INDEX'] for row in tables[0]] != list(range(SUMMARY_ONTS)):
+        failures += 1
+        print(f'FAIL synthetic service ports\n  got: {tables!r}')
+
+    raw = synthetic_summary(SUMMARY_ONTS)
+    chunked = feed_chunks(ont.OntSummaryParser(), paginated(raw))
+    if chunked != ont._parse_onts_info(raw):
+        failures += 1
+        print(f'FAIL synthetic summary fed in chunks\n  got: {chunked!r}')
+
+    raw = synthetic_service_ports(cases, SUMMARY_ONTS)
+    chunked = feed_chunks(ont.OutputParser(), paginated(raw))
+    if chunked != ont._parse_output(raw):
+        failures += 1
+        print(f'FAIL synthetic service ports fed in chunks\n  got: {chunked!r}')
+
+    raw = cases['get mac address'] # read until first row like search_ont does, notes must not be fed
+    parser, rows, fed = ont.OutputParser(ont.MAC_HEADING), [], 0
+    while not rows and fed < len(raw):
+        rows = [item for kind, _, item in parser.feed(raw[fed:fed + FEED_CHUNK]) if kind == 'row']
+        fed += FEED_CHUNK
+    if not rows or ont.format_mac(rows[0].get('MAC')) != '9c:37:f4:34:80:75' or fed >= len(raw):
+        failures += 1
+        print(f'FAIL first row of mac address table fed in chunks\n  got: {rows!r} after {fed} of {len(raw)} chars')
+    return failures
+
+def bench(cases: dict[str, str], filter: str | None = None):
+    """Print parses/sec and peak memory per parse for every check case and synthetic case"""
+    runs = [(title, parser, cases[title]) for title, parser, _ in CHECKS]
+    runs += [
+        (f'synthetic summary ({SUMMARY_ONTS} ONTs)', ont._parse_onts_info, synthetic_summary(SUMMARY_ONTS)),
+        (f'synthetic summary ({SUMMARY_ONTS} ONTs) fed in 1 KiB chunks', summary_chunks,
+            synthetic_summary(SUMMARY_ONTS)),
+        (f'synthetic service ports ({SUMMARY_ONTS} rows)', ont._parse_output,
+            synthetic_service_ports(cases, SUMMARY_ONTS))
+    ]
+    print(f'{"case":<66} {"parser":<24} {"KiB":>6} {"parses/s":>10} {"peak KiB":>9}')
+    for title, parser, raw in runs:
+        if filter and filter not in title:
+            continue
+
+        def run():
+            try:
+                parser(raw)
+            except ValueError:
+                pass
+
+        number, seconds = Timer(run).autorange()
+        start()
+        reset_peak()
+        run()
+        _, peak = get_traced_memory()
+        stop()
+        name = getattr(parser, '__name__', '')
+        name = '_parse_service_port' if name == '<lambda>' else name
+        print(f'{title[:66]:<66} {name:<24} {len(raw) / 1024:>6.1f} {number / seconds:>10.0f} {peak / 1024:>9.1f}')
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check-only', action='store_true', help='only check parsers results')
+    parser.add_argument('--filter', help='benchmark only cases with this text in title')
+    parser.add_argument('--commands', type=Path, default=ROOT / 'ont_commands.txt', help='transcript file')
+    args = parser.parse_args()
+
+    cases = load_cases(args.commands)
+    failures = check(cases)
+    print(f'{len(CHECKS) + 5 - failures}/{len(CHECKS) + 5} checks passed')
+    if not args.check_only:
+        bench(cases, args.filter)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,585 @@
+"""Simulated Huawei OLT SSH server for local ont.py testing
+
+Emulates CLI of Huawei MA5600/MA5800 OLT as seen in ont_commands.txt: user/enable/config/interface
+modes and prompts, "---- More ----" pagination, "{ <cr>|... }:" continuation prompts and ONT
+diagnostic commands. ONTs are generated randomly (with fixed seed).
+
+Usage (from project root):
+    python scripts/fake_olt.py --port 2222 --latency 0.05 --max-sessions 4
+    # then set SSH_USER/SSH_PASSWORD to anything and connect ont.py to 127.0.0.1:2222
+"""
+from argparse import ArgumentParser
+from random import Random
+from socket import socket, AF_INET, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR
+from threading import Thread, Lock
+from time import sleep
+
+from paramiko import ServerInterface, Transport, RSAKey, AUTH_SUCCESSFUL, OPEN_SUCCEEDED
+
+PAGINATION = "---- More ( Press 'Q' to break ) ----"
+PAGINATION_ERASE = '\x1b[37D' + ' ' * 35 + '\x1b[37D'
+DIVIDER = '  ' + '-' * 77
+SHORT_DIVIDER = '  ' + '-' * 49
+CONTINUATION = '{ <cr>|autosense<K>|e2e<K>|ont<K>|sort-by<K> }:'
+ETH_CONTINUATION = '{ <cr>|eth-port<K>|ont-port-id<U><1,8> }:'
+UNKNOWN_COMMAND = "                                  ^\r\n  % Unknown command, the error locates at '^'"
+DOWN_CAUSES = ('dying-gasp', 'LOS', 'LOSi/LOBi', 'ONT reset', '-')
+
+
+class Ont:
+    """Generated ONT"""
+    def __init__(self, rnd: Random, frame: int, slot: int, port: int, id: int):
+        self.frame, self.slot, self.port, self.id = frame, slot, port, id
+        self.sn = '48575443' + ''.join(rnd.choice('0123456789ABCDEF') for _ in range(8))
+        self.online = rnd.random() < 0.85
+        self.catv_ports = rnd.choice((0, 1, 2))
+        self.catv = [rnd.random() < 0.5 for _ in range(self.catv_ports)]
+        self.eth_ports = rnd.choice((1, 2, 4))
+        self.ip = f'10.{slot}.{port}.{id + 2}' if self.online else None
+        self.rx = round(rnd.uniform(-28, -14), 2)
+        self.tx = round(rnd.uniform(1.5, 3), 2)
+        self.distance = rnd.randint(50, 9000)
+        self.down_cause = rnd.choice(DOWN_CAUSES)
+        self.service_port = rnd.randint(1, 4000)
+        self.mac = '-'.join(''.join(rnd.choice('0123456789abcdef') for _ in range(4)) for _ in range(3))
+        self.uptime = (rnd.randint(0, 300), rnd.randint(0, 23), rnd.randint(0, 59), rnd.randint(0, 59))
+
+    @property
+    def fsp(self) -> str:
+        return f'{self.frame}/{self.slot}/{self.port}'
+
+
+class Olt:
+    """Generated OLT with GPON boards"""
+    def __init__(self, name: str, slots: list[int], ports: int, onts_per_port: int, seed: int = 1):
+        rnd = Random(seed)
+        self.name = name
+        self.slots = slots
+        self.ports = ports
+        self.onts: dict[str, Ont] = {}
+        self.by_port: dict[tuple[int, int, int], list[Ont]] = {}
+        for slot in slots:
+            for port in range(ports):
+                onts = [Ont(rnd, 0, slot, port, id) for id in range(rnd.randint(0, onts_per_port))]
+                self.by_port[(0, slot, port)] = onts
+                for ont in onts:
+                    self.onts[ont.sn] = ont
+
+    def find(self, slot: int, port: int, id: int, frame: int = 0) -> Ont | None:
+        for ont in self.by_port.get((frame, slot, port), []):
+            if ont.id == id:
+                return ont
+        return None
+
+
+def _field(name: str, value, width: int = 24) -> str:
+    return f'  {name:<{width}}: {value}'
+
+def by_sn(ont: Ont) -> list[str]:
+    """display ont info by-sn"""
+    days, hours, minutes, seconds = ont.uptime
+    return [
+        DIVIDER,
+        _field('F/S/P', ont.fsp),
+        _field('ONT-ID', ont.id),
+        _field('Control flag', 'active'),
+        _field('Run state', 'online' if ont.online else 'offline'),
+        _field('Config state', 'normal' if ont.online else 'initial'),
+        _field('Match state', 'match' if ont.online else 'initial'),
+        _field('DBA type', 'SR' if ont.online else '-'),
+        _field('ONT distance(m)', ont.distance if ont.online else '-'),
+        _field('ONT last distance(m)', ont.distance),
+        _field('ONT battery state', 'not support' if ont.online else '-'),
+        _field('Memory occupation', '42%' if ont.online else '-'),
+        _field('CPU occupation', '3%' if ont.online else '-'),
+        _field('Temperature', '48(C)' if ont.online else '-'),
+        _field('Authentic type', 'SN-auth'),
+        _field('SN', f'{ont.sn} (HWTC-{ont.sn[8:]})'),
+        _field('Management mode', 'OMCI'),
+        _field('Software work mode', 'normal'),
+        _field('Isolation state', 'normal'),
+        _field('ONT IP 0 address/mask', f'{ont.ip}/24' if ont.ip else '-'),
+        _field('Description', 'ONT_NO_DESCRIPTION'),
+        _field('Last down cause', ont.down_cause),
+        _field('Last up time', '2026-10-01 10:00:00+06:00'),
+        _field('Last down time', '2026-09-30 09:00:00+06:00'),
+        _field('Last dying gasp time', '-'),
+        _field('ONT online duration', f'{days} day(s), {hours} hour(s), {minutes} minute(s), {seconds} second(s)'
+            if ont.online else '-'),
+        _field('Type C support', '-'),
+        _field('Interoperability-mode', 'Unknown'),
+        _field('Power reduction status', '-'),
+        _field('FEC upstream state', 'use-profile-config'),
+        DIVIDER,
+        _field('VoIP configure method', 'Default'),
+        DIVIDER,
+        '  Line profile ID      : 98',
+        '  Line profile name    : onu-router-line-HUR2102XR',
+        DIVIDER,
+        '  FEC upstream switch :Disable',
+        '  OMCC encrypt switch :Off',
+        '  Qos mode            :PQ',
+        '  Mapping mode        :VLAN',
+        '  TR069 management    :Disable',
+        '  TR069 IP index      :0',
+        DIVIDER,
+        '  Notes: * indicates Discrete TCONT(TCONT Unbound)',
+        DIVIDER,
+        '  <T-CONT   0>          DBA Profile-ID:1',
+        '  <T-CONT   4>          DBA Profile-ID:16',
+        '   <Gem Index 11>',
+        '   --------------------------------------------------------------------',
+        '   |Serv-Type:ETH |Encrypt:off |Cascade:off |GEM-CAR:-            |',
+        '   |Upstream-priority-queue:0  |Downstream-priority-queue:-       |',
+        '   --------------------------------------------------------------------',
+        '    Mapping VLAN  Priority Port    Port  Bundle  Flow  Transparent',
+        '    index                  type    ID    ID      CAR',
+        '   --------------------------------------------------------------------',
+        '    0       199   -        -       -     -       -     -',
+        '   --------------------------------------------------------------------',
+        DIVIDER,
+        '  Notes: Run the display traffic table ip command to query',
+        '         traffic table configuration',
+        DIVIDER,
+        '  Service profile ID   : 98',
+        '  Service profile name : onu-router-srv-HUR2101XR',
+        DIVIDER,
+        '  Port-type     Port-number     Max-adaptive-number',
+        DIVIDER,
+        '  POTS          adaptive        32',
+        f'  ETH           {ont.eth_ports:<16}-',
+        '  VDSL          0               -',
+        '  TDM           0               -',
+        '  MOCA          0               -',
+        f'  CATV          {ont.catv_ports:<16}-',
+        DIVIDER,
+        '  TDM port type                     : E1',
+        '  TDM service type                  : TDMoGem',
+        '  MAC learning function switch      : Enable',
+        '  ONT transparent function switch   : Disable',
+        '  Ring check switch                 : Disable',
+        '  Multicast forward mode            : Unconcern',
+        '  Native VLAN option                : Concern',
+        DIVIDER,
+        '  Port-type Port-ID QinQmode  PriorityPolicy Inbound     Outbound',
+        DIVIDER,
+        *[f'  ETH       {i:<8}unconcern unconcern      unconcern   unconcern' for i in range(1, ont.eth_ports + 1)],
+        DIVIDER,
+        '  Alarm policy profile ID      : 0',
+        '  Alarm policy profile name    : alarm-policy_0',
+        DIVIDER,
+        DIVIDER,
+        '  The number of required ONTs     : 1',
+        DIVIDER
+    ]
+
+def optical_info(ont: Ont) -> list[str]:
+    """display ont optical-info"""
+    if not ont.online:
+        return ['  Failure: The ONT is not online']
+    return [
+        DIVIDER,
+        _field('ONU NNI port ID', 0, 39),
+        _field('Module type', 'GPON', 39),
+        _field('Optical power precision(dBm)', '3.0', 39),
+        _field('Vendor name', 'HUAWEI', 39),
+        _field('Vendor rev', '-', 39),
+        _field('Vendor PN', 'HW-BOB-0002', 39),
+        _field('Vendor SN', '1505E1263456C', 39),
+        _field('Rx optical power(dBm)', f'{ont.rx:.2f}', 39),
+        _field('Rx power current alarm threshold(dBm)', '[-29.0,-7.0]', 39),
+        _field('Tx optical power(dBm)', f'{ont.tx:.2f}', 39),
+        _field('Laser bias current(mA)', 8, 39),
+        _field('Temperature(C)', 44, 39),
+        _field('Voltage(V)', '3.220', 39),
+        _field('OLT Rx ONT optical power(dBm)', f'{ont.rx - 3:.2f}', 39),
+        _field('CATV Rx optical power(dBm)', '-', 39),
+        DIVIDER
+    ]
+
+def catv_attribute(ont: Ont, catv_id: int) -> list[str]:
+    """display ont port attribute ... catv"""
+    if catv_id > max(ont.catv_ports, 2):
+        return ['  Failure: The ONT port ID does not exist']
+    state = ont.catv[catv_id - 1] if catv_id <= ont.catv_ports else False
+    return [
+        '  -------------------------------------------------',
+        '  ONT  ONT      ONT        Port    Frequency',
+        '       port-ID  port-type  switch',
+        '  -------------------------------------------------',
+        f'  {ont.id:>3}  {catv_id:>7}  CATV       {"on" if state else "off":<8}all-pass',
+        '  -------------------------------------------------'
+    ]
+
+def eth_state(ont: Ont) -> list[str]:
+    """display ont port state ... eth-port all"""
+    if not ont.online:
+        return ['  Failure: The ONT is not online']
+    return [
+        '  --------------------------------------------------------------------------',
+        '  ONT-ID   ONT      ONT       Speed(Mbps)   Duplex   LinkState  RingStatus',
+        '           port-ID  Port-type',
+        '  --------------------------------------------------------------------------',
+        *[
+            f'  {ont.id:>6} {port:>9}         GE {"1000" if port == 1 else "-":<13} {"full" if port == 1 else "-":<8} '
+            f'{"up" if port == 1 else "down":<10} -'
+            for port in range(1, ont.eth_ports + 1)
+        ],
+        '  --------------------------------------------------------------------------'
+    ]
+
+def service_port(ont: Ont) -> list[str]:
+    """display service-port port ... ont"""
+    return [
+        '',
+        '  Command:',
+        f'          display service-port port {ont.fsp} ont {ont.id}',
+        '  Switch-Oriented Flow List',
+        DIVIDER,
+        '   INDEX VLAN VLAN     PORT F/ S/ P VPI  VCI   FLOW  FLOW       RX   TX   STATE',
+        '         ID   ATTR     TYPE                    TYPE  PARA',
+        DIVIDER,
+        f'   {ont.service_port:>5}  993 common   gpon {ont.frame}/{ont.slot} /{ont.port}  {ont.id:<4} 11    vlan  1'
+        f'          -    -    {"up" if ont.online else "down"}',
+        DIVIDER,
+        '   Total : 1  (Up/Down :    1/0)',
+        '   Note : F--Frame, S--Slot, P--Port,',
+        '          VPI indicates ONT ID for PON, VCI indicates GEM index for GPON,',
+        '          v/e--vlan/encap, pritag--priority-tagged,'
+    ]
+
+def mac_address(ont: Ont) -> list[str]:
+    """display mac-address service-port"""
+    if not ont.online:
+        return ['  Failure: There is not any MAC address record']
+    return [
+        '  -----------------------------------------------------------------------',
+        '   SRV-P BUNDLE TYPE MAC            MAC TYPE F /S /P   VPI  VCI   VLAN ID',
+        '   INDEX INDEX',
+        '  -----------------------------------------------------------------------',
+        f'   {ont.service_port:>5}     -  gpon {ont.mac} dynamic  {ont.frame} /{ont.slot} /{ont.port}   '
+        f'{ont.id:<4} 11        993',
+        '  -----------------------------------------------------------------------',
+        '  Total: 1',
+        '  Note: F--Frame, S--Slot, P--Port, F/S/P indicates PW Index for PW,'
+    ]
+
+def summary(olt: Olt, frame: int, slot: int, port: int) -> list[str]:
+    """display ont info summary"""
+    if (frame, slot, port) not in olt.by_port:
+        return ['  % Parameter error, the error locates at \'^\'']
+    onts = olt.by_port[(frame, slot, port)]
+    lines = [
+        DIVIDER,
+        f'  In port {frame}/{slot}/{port}, the total of ONTs are: {len(onts)}, online: '
+        f'{sum(ont.online for ont in onts)}',
+        DIVIDER,
+        '  ONT  Run     Last                Last                Last',
+        '  ID   State   UpTime              DownTime            DownCause',
+        DIVIDER
+    ]
+    for ont in onts:
+        lines.append(
+            f'  {ont.id:<4} {"online" if ont.online else "offline":<7} 2026-10-01 10:00:00 2026-09-30 09:00:00 '
+            f'{ont.down_cause}'
+        )
+    lines += [
+        DIVIDER,
+        '  ONT        SN        Type          Distance Rx/Tx power  Description',
+        '  ID                                    (m)      (dBm)',
+        DIVIDER
+    ]
+    for ont in onts:
+        power = f'{ont.rx:.2f}/{ont.tx:.2f}' if ont.online else '-/-'
+        lines.append(
+            f'  {ont.id:<4} {ont.sn:<16}  {"HG8245H":<12}  {ont.distance if ont.online else "-":<7}  '
+            f'{power:<12} ONT_NO_DESCRIPTION'
+        )
+    lines.append(DIVIDER)
+    return lines
+
+def board(olt: Olt) -> list[str]:
+    """display board 0"""
+    lines = [
+        '  -------------------------------------------------------------------------',
+        '  SlotID  BoardName  Status          SubType0 SubType1    Online/Offline',
+        '  -------------------------------------------------------------------------'
+    ]
+    for slot in range(max(olt.slots) + 3):
+        if slot in olt.slots:
+            lines.append(f'  {slot:<7} H807GPBH   Normal')
+        elif slot == max(olt.slots) + 1:
+            lines.append(f'  {slot:<7} H902MPLA   Active_normal   CPCF')
+        else:
+            lines.append(f'  {slot:<7}')
+    lines.append('  -------------------------------------------------------------------------')
+    return lines
+
+
+class ServerAuth(ServerInterface):
+    """Accept any login"""
+    def check_auth_password(self, username, password):
+        return AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        return OPEN_SUCCEEDED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        return True
+
+
+class Cli:
+    """One CLI session"""
+    def __init__(self, channel, olt: Olt, latency: float, page_lines: int):
+        self.channel = channel
+        self.olt = olt
+        self.latency = latency
+        self.page_lines = page_lines
+        self.modes: list[str] = []
+        self.buffer = ''
+
+    @property
+    def prompt(self) -> str:
+        if not self.modes:
+            return f'{self.olt.name}>'
+        if self.modes[-1] == 'enable':
+            return f'{self.olt.name}#'
+        return f'{self.olt.name}({self.modes[-1]})#'
+
+    def send(self, text: str):
+        self.channel.sendall(text.encode())
+
+    def readline(self) -> str | None:
+        while '\n' not in self.buffer:
+            data = self.channel.recv(1024)
+            if not data:
+                return None
+            self.buffer += data.decode(errors='ignore').replace('\r', '')
+        line, self.buffer = self.buffer.split('\n', 1)
+        return line
+
+    def readkey(self) -> str | None:
+        if not self.buffer:
+            data = self.channel.recv(1024)
+            if not data:
+                return None
+            self.buffer += data.decode(errors='ignore')
+        key, self.buffer = self.buffer[0], self.buffer[1:]
+        return key
+
+    def output(self, lines: list[str]):
+        """Send output lines with pagination"""
+        for i in range(0, len(lines), self.page_lines):
+            if i:
+                self.send(PAGINATION)
+                key = self.readkey()
+                if key is None or key.lower() == 'q':
+                    self.send('\r\n')
+                    return
+                self.send(PAGINATION_ERASE)
+            self.send('\r\n'.join(lines[i:i + self.page_lines]) + '\r\n')
+
+    def continuation(self, prompt: str) -> bool:
+        """Show "{ <cr>|... }:" prompt and wait for enter"""
+        self.send(prompt)
+        line = self.readline()
+        self.send('\r\n')
+        return line is not None and line.strip() == ''
+
+    def run(self):
+        self.send(f'\r\n\r\nWarning: simulated OLT\r\n\r\n{self.prompt}')
+        while True:
+            line = self.readline()
+            if line is None:
+                return
+            self.send(line + '\r\n') # echo
+            command = line.strip()
+            if command:
+                if self.latency:
+                    sleep(self.latency)
+                if not self.execute(command):
+                    return
+            self.send(('\r\n' if command else '') + self.prompt)
+
+    def execute(self, command: str) -> bool:
+        words = command.split()
+        olt = self.olt
+        if command == 'quit':
+            if not self.modes:
+                return False
+            self.modes.pop()
+            return True
+        if command == 'enable':
+            if not self.modes:
+                self.modes.append('enable')
+            return True
+        if command == 'config':
+            if self.modes == ['enable']:
+                self.modes.append('config')
+            return True
+        if words[0] == 'scroll':
+            if len(words) > 1 and words[1].isdigit():
+                self.page_lines = max(10, min(512, int(words[1])))
+            return True
+        if words[:2] == ['interface', 'gpon'] and len(words) == 3 and self.modes[-1:] == ['config']:
+            self.modes.append(f'config-if-gpon-{words[2]}')
+            return True
+
+        interface = self.modes[-1][len('config-if-gpon-'):] if self.modes and \
+            self.modes[-1].startswith('config-if-gpon-') else None
+        frame, slot = map(int, interface.split('/')) if interface else (None, None)
+
+        if words[:4] == ['display', 'ont', 'info', 'by-sn'] and len(words) == 5:
+            ont = olt.onts.get(words[4])
+            self.output(by_sn(ont) if ont else ['  The required ONT does not exist'])
+        elif words[:4] == ['display', 'ont', 'info', 'summary'] and len(words) == 5:
+            try:
+                fsp = tuple(map(int, words[4].split('/')))
+            except ValueError:
+                fsp = ()
+            self.output(summary(olt, *fsp) if len(fsp) == 3 else ['  % Parameter error'])
+        elif words[:3] == ['display', 'board', '0']:
+            self.output(board(olt))
+        elif words[:3] == ['display', 'service-port', 'port'] and len(words) == 6 and words[4] == 'ont':
+            if not self.continuation(CONTINUATION):
+                return True
+            frame, slot, port = map(int, words[3].split('/'))
+            ont = olt.find(slot, port, int(words[5]), frame)
+            self.output(service_port(ont) if ont else ['  Failure: No service virtual port can be operated'])
+        elif words[:3] == ['display', 'mac-address', 'service-port'] and len(words) == 4:
+            ont = next((ont for ont in olt.onts.values() if str(ont.service_port) == words[3]), None)
+            self.output(mac_address(ont) if ont else ['  Failure: There is not any MAC address record'])
+        elif interface and words[:3] == ['display', 'ont', 'optical-info'] and len(words) == 5:
+            ont = olt.find(slot, int(words[3]), int(words[4]), frame)
+            self.output(optical_info(ont) if ont else ['  Failure: The ONT does not exist'])
+        elif interface and words[:4] == ['display', 'ont', 'port', 'attribute'] and words[6:7] == ['catv']:
+            ont = olt.find(slot, int(words[4]), int(words[5]), frame)
+            self.output(catv_attribute(ont, int(words[7])) if ont else ['  Failure: The ONT does not exist'])
+        elif interface and words[:4] == ['display', 'ont', 'port', 'state'] and words[6:8] == ['eth-port', 'all']:
+            if not self.continuation(ETH_CONTINUATION):
+                return True
+            ont = olt.find(slot, int(words[4]), int(words[5]), frame)
+            self.output(eth_state(ont) if ont else ['  Failure: The ONT does not exist'])
+        elif interface and words[:2] == ['ont', 'reset'] and len(words) == 4:
+            ont = olt.find(slot, int(words[2]), int(words[3]), frame)
+            self.send('  Resetting the ONT(s) will interrupt all services on the ONT(s)\r\n'
+                '  Are you sure to reset the ONT(s)? (y/n)[n]: ')
+            answer = self.readline()
+            self.send((answer or '') + '\r\n')
+            if answer is not None and answer.strip() == 'y':
+                if ont is None or not ont.online:
+                    self.output(['  Failure: The ONT is not online'])
+        elif interface and words[:3] == ['ont', 'port', 'attribute'] and words[5:6] == ['catv'] and \
+            words[7:8] == ['operational-state']:
+            ont = olt.find(slot, int(words[3]), int(words[4]), frame)
+            catv_id = int(words[6])
+            if ont is None or catv_id > ont.catv_ports:
+                self.output(['  Failure: The ONT port ID does not exist'])
+            elif ont.catv[catv_id - 1] == (words[8] == 'on'):
+                self.output(['  Failure: Make configuration repeatedly'])
+            else:
+                ont.catv[catv_id - 1] = words[8] == 'on'
+        else:
+            self.send(UNKNOWN_COMMAND + '\r\n')
+        return True
+
+
+class FakeOltServer:
+    """SSH server accepting connections in background threads"""
+    def __init__(self, olt: Olt, host: str = '127.0.0.1', port: int = 2222, latency: float = 0,
+                 max_sessions: int = 4, page_lines: int = 60):
+        self.olt = olt
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.max_sessions = max_sessions
+        self.page_lines = page_lines
+        self.host_key = RSAKey.generate(2048)
+        self.sessions = 0
+        self.total_sessions = 0
+        self.rejected = 0
+        self._lock = Lock()
+        self._socket = socket(AF_INET, SOCK_STREAM)
+        self._socket.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+
+    def start(self) -> 'FakeOltServer':
+        """Start listening in background"""
+        self._socket.bind((self.host, self.port))
+        self.port = self._socket.getsockname()[1]
+        self._socket.listen(100)
+        Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                return
+            Thread(target=self._handle, args=(client,), daemon=True).start()
+
+    def _handle(self, client):
+        transport = Transport(client)
+        transport.add_server_key(self.host_key)
+        try:
+            transport.start_server(server=ServerAuth())
+            channel = transport.accept(10)
+            if channel is None:
+                return
+            with self._lock:
+                if self.sessions >= self.max_sessions:
+                    self.rejected += 1
+                    channel.sendall(b'\r\n  Reenter times have reached the upper limit.\r\n')
+                    channel.close()
+                    return
+                self.sessions += 1
+                self.total_sessions += 1
+            try:
+                Cli(channel, self.olt, self.latency, self.page_lines).run()
+            finally:
+                with self._lock:
+                    self.sessions -= 1
+                channel.close()
+        except Exception:
+            pass
+        finally:
+            transport.close()
+
+    def stop(self):
+        self._socket.close()
+
+
+def main():
+    parser = ArgumentParser(description='Simulated Huawei OLT SSH server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2222)
+    parser.add_argument('--name', default='JBI-Grand', help='OLT name shown in prompt')
+    parser.add_argument('--latency', type=float, default=0.05, help='delay before each command output (s)')
+    parser.add_argument('--max-sessions', type=int, default=4, help='max simultaneous CLI sessions')
+    parser.add_argument('--page-lines', type=int, default=60, help='lines before "---- More ----"')
+    parser.add_argument('--slots', default='1,2', help='comma separated GPON board slots')
+    parser.add_argument('--ports', type=int, default=16, help='ports per board')
+    parser.add_argument('--onts', type=int, default=32, help='max ONTs per port')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    olt = Olt(args.name, [int(slot) for slot in args.slots.split(',')], args.ports, args.onts, args.seed)
+    server = FakeOltServer(olt, args.host, args.port, args.latency, args.max_sessions, args.page_lines).start()
+    print(f'fake OLT {olt.name} listening on {args.host}:{server.port}, {len(olt.onts)} ONTs')
+    for sn in list(olt.onts)[:5]:
+        print(f'  {sn} at {olt.onts[sn].fsp} ont {olt.onts[sn].id} ({"online" if olt.onts[sn].online else "offline"})')
+    try:
+        while True:
+            sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
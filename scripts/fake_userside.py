@@ -0,0 +1,334 @@
+"""Local UserSide API stand-in for load testing
+
+Serves `api.php?key=...&cat=...&action=...` calls used by SmartLinkAPI from generated dataset, with
+configurable latency and error rate. Records are generated on request from seed and id, so big
+datasets cost nothing. Point config.py to it:
+
+    API_URL = 'http://127.0.0.1:8099/api.php?key=fake&cat='
+
+Call counters are served at /_stats (POST /_stats/reset to clear), dataset sizes at /_info.
+
+Usage (from repo root): python scripts/fake_userside.py [--port 8099] [--latency 0.05] [--error-rate 0.01]
+"""
+from argparse import ArgumentParser
+from asyncio import sleep
+from collections import Counter
+from random import Random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CUSTOMERS = 20000
+CUSTOMERS_PER_HOUSE = 40 # customers in one box (house)
+MAX_TASKS_PER_CUSTOMER = 6
+EMPLOYEES = 300
+TARIFFS = 30
+CUSTOMER_GROUPS = 8
+OLTS = 4
+TASK_STATES = (1, 3, 10, 11, 16, 17, 18, 19, 2) # 2 is closed
+TASK_TYPES = {28: 'Подключение', 37: 'Обращение абонента', 38: 'Регистрация звонка'}
+DOWN_CAUSES = ('dying-gasp', 'LOS', 'ONT reset')
+
+
+class Dataset:
+    """Deterministic generated UserSide data"""
+    def __init__(self, customers: int = CUSTOMERS, seed: int = 1):
+        self.customers = customers
+        self.houses = (customers + CUSTOMERS_PER_HOUSE - 1) // CUSTOMERS_PER_HOUSE
+        self.seed = seed
+        self.next_id = 10_000_000 # ids of created tasks and comments
+
+    def _random(self, kind: str, id: int) -> Random:
+        return Random(f'{self.seed}:{kind}:{id}')
+
+    def customer(self, id: int) -> dict | None:
+        if not 1 <= id <= self.customers:
+            return None
+        rnd = self._random('customer', id)
+        sn = f'HWTC{rnd.getrandbits(32):08X}' if rnd.random() < 0.8 else ''
+        house = self.customer_house(id)
+        return {
+            'id': id,
+            'full_name': f'Абонент {id} ({sn})',
+            'state_id': rnd.choice((0, 1, 2, 2, 2, 2)),
+            'agreement': [{'number': str(100000 + id)}],
+            'tariff': {'current': [{'id': str(rnd.randint(1, TARIFFS))}]},
+            'phone': [{'number': f'0555{id:06d}'}],
+            'balance': round(rnd.uniform(-500, 2000), 2),
+            'manager_id': rnd.randint(1, EMPLOYEES),
+            'is_in_billing': 1,
+            'billing_id': str(rnd.randint(1, 3)),
+            'crc_billing': f'{rnd.getrandbits(32):08x}',
+            'date_create': '2023-01-10 12:00:00',
+            'date_connect': '2023-01-12 15:30:00',
+            'date_activity': '2026-10-17 21:14:08',
+            'date_activity_inet': '2026-10-17 21:14:08',
+            'address': [{
+                'house_id': house,
+                'entrance': str(rnd.randint(1, 4)),
+                'floor': str(rnd.randint(1, 9)),
+                'apartment': {'number': str(rnd.randint(1, 120))}
+            }],
+            'group': {'1': {'id': rnd.randint(1, CUSTOMER_GROUPS)}},
+            'ip_mac': {'1': {'ip': str(167772160 + id), 'mac': f'{rnd.getrandbits(48):012x}'}},
+            'additional_data': {
+                '7': {'value': f'{42.8 + rnd.random() / 10:.6f},{74.5 + rnd.random() / 10:.6f}'},
+                '42': {'value': f'ул. Тестовая, {house}'}
+            }
+        }
+
+    def customer_house(self, id: int) -> int:
+        return (id - 1) // CUSTOMERS_PER_HOUSE + 1
+
+    def house_customers(self, house: int) -> list[int]:
+        if not 1 <= house <= self.houses:
+            return []
+        return list(range((house - 1) * CUSTOMERS_PER_HOUSE + 1, min(house * CUSTOMERS_PER_HOUSE, self.customers) + 1))
+
+    def house(self, id: int) -> dict | None:
+        if not 1 <= id <= self.houses:
+            return None
+        rnd = self._random('house', id)
+        lat, lon = 42.8 + rnd.random() / 10, 74.5 + rnd.random() / 10
+        return {
+            'id': id,
+            'full_name': f'ул. Тестовая, {id}',
+            'coordinates': [[lat, lon], [lat + 0.0002, lon], [lat + 0.0002, lon + 0.0003], [lat, lon]],
+            'manage_employee_id': rnd.randint(1, EMPLOYEES),
+            'is_not_use': 0
+        }
+
+    def customer_tasks(self, customer: int) -> list[int]:
+        if not 1 <= customer <= self.customers:
+            return []
+        count = self._random('tasks', customer).randint(0, MAX_TASKS_PER_CUSTOMER)
+        return [customer * 10 + i for i in range(count)]
+
+    def task(self, id: int) -> dict | None:
+        customer = id // 10
+        if id not in self.customer_tasks(customer):
+            return None
+        rnd = self._random('task', id)
+        type_id = rnd.choice(tuple(TASK_TYPES))
+        state_id = rnd.choice(TASK_STATES)
+        return {
+            'id': id,
+            'customer': [customer],
+            'author_employee_id': rnd.randint(1, EMPLOYEES),
+            'type': {'id': type_id, 'name': TASK_TYPES[type_id]},
+            'state': {'id': state_id, 'name': f'Состояние {state_id}', 'system_role': 2 if state_id == 2 else 1},
+            'date': {'create': '2026-10-01 10:00:00', 'todo': '2026-10-02 10:00:00', 'update': '2026-10-03 10:00:00'},
+            'address': {'addressId': self.customer_house(customer), 'text': f'ул. Тестовая, {self.customer_house(customer)}',
+                        'apartment': str(rnd.randint(1, 120))},
+            'additional_data': {
+                '28': {'value': 'Звонок'},
+                '29': {'value': f'0555{customer:06d}'},
+                '30': {'value': 'Нет интернета'}
+            },
+            'comments': {
+                str(i): {'id': id * 100 + i, 'dateAdd': '2026-10-01 11:00:00', 'employee_id': rnd.randint(1, EMPLOYEES),
+                         'comment': f'Комментарий {i}'}
+                for i in range(rnd.randint(0, 4))
+            },
+            'staff': {'employee': {'1': rnd.randint(1, EMPLOYEES)}, 'division': {'1': rnd.randint(1, 10)}}
+        }
+
+    def attachs(self, object_type: str, object_id: int) -> dict:
+        rnd = self._random(f'attach-{object_type}', object_id)
+        return {
+            f'{object_type}-{object_id}-{i}': {
+                'id': f'{object_type}-{object_id}-{i}',
+                'internal_filepath': f'{object_type}_{object_id}_{i}.jpg' if i % 3 else f'{object_type}_{object_id}_{i}',
+                'date_add': '2026-10-01 12:00:00',
+                'object_id': object_id
+            } for i in range(rnd.randint(0, 3))
+        }
+
+    def ont(self, sn: str) -> dict | None:
+        if not sn.startswith('HWTC'):
+            return None
+        rnd = self._random('ont', int(sn[4:], 16))
+        return {'level_onu_rx': round(rnd.uniform(-28, -15), 2), 'device_id': rnd.randint(1, OLTS)}
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+
+def _ids(value: str | None) -> list[int]:
+    return [int(id) for id in (value or '').split(',') if id.strip().isdigit()]
+
+def _items(records: dict[int, dict | None], ids: list[int], keyed: bool = False) -> dict:
+    """UserSide answer for id list: single record for one id (unless `keyed`), {id: record} for several"""
+    found = {id: record for id, record in records.items() if record is not None}
+    if not found:
+        return {'result': 'ERROR', 'error': 'not found'}
+    if len(ids) == 1 and not keyed:
+        return {'result': 'OK', 'data': found[ids[0]]}
+    return {'result': 'OK', 'data': {str(id): record for id, record in found.items()}}
+
+def handle(data: Dataset, cat: str, action: str, params: dict) -> dict:
+    """Answer UserSide API call"""
+    ids = _ids(params.get('id'))
+    match cat, action:
+        case 'tariff', 'get':
+            return {'data': {str(i): {'billing_uuid': str(i), 'name': f'Тариф {i}'} for i in range(1, TARIFFS + 1)}}
+        case 'customer', 'get_customer_group':
+            return {'data': {str(i): {'id': i, 'name': f'Группа {i}'} for i in range(1, CUSTOMER_GROUPS + 1)}}
+        case 'additional_data', 'get_list':
+            return {'data': {str(i): {'id': i, 'available_value': ['Вариант 1\nВариант 2']} for i in (28, 30)}}
+        case 'additional_data', 'change_value':
+            return {'result': 'OK'}
+        case 'inventory', 'get_inventory_section_catalog':
+            return {'data': {str(i): {'id': i, 'name': f'Раздел {i}', 'type_id': 1, 'parent_id': 0} for i in range(1, 6)}}
+        case 'inventory', 'get_inventory_catalog':
+            return {'data': {str(i): {'id': i, 'name': f'Модель {i}', 'inventory_section_catalog_id': i % 5 + 1}
+                             for i in ids or range(1, 21)}}
+        case 'inventory', 'get_inventory_amount':
+            object_id = int(params.get('object_id', 0))
+            return {'data': {str(object_id * 10 + i): {
+                'id': object_id * 10 + i, 'inventory_type_id': i + 1, 'catalog_id': i + 1, 'amount': 1,
+                'serial_number': f'SN{object_id}{i}', 'location_type': 'customer', 'object_id': object_id
+            } for i in range(2)}}
+        case 'device', 'get_data':
+            return {'data': {str(i): {'id': i, 'name': f'OLT-{i}', 'host': f'10.0.0.{i}', 'is_online': 1,
+                                      'location': f'Узел {i}'} for i in range(1, OLTS + 1)}}
+        case 'device', 'get_ont_data':
+            ont = data.ont(params.get('id', ''))
+            return {'result': 'OK', 'data': ont} if ont else {'result': 'ERROR', 'data': []}
+        case 'employee', 'get_division_list':
+            return {'data': {str(i): {'id': i, 'parent_id': 0, 'name': f'Отдел {i}'} for i in range(1, 11)}}
+        case 'employee', 'get_data':
+            ids = ids or list(range(1, EMPLOYEES + 1))
+            return _items({id: {'id': id, 'name': f'Сотрудник {id}'} if id <= EMPLOYEES else None for id in ids}, ids,
+                          keyed=True)
+        case 'employee', 'check_pass':
+            return {'result': 'OK'}
+        case 'employee', 'get_employee_id':
+            return {'id': 1}
+        case 'customer', 'get_data':
+            return _items({id: data.customer(id) for id in ids}, ids)
+        case 'customer', 'get_customer_id':
+            value = params.get('data_value', '')
+            id = int(value[-6:]) if params.get('data_typer') == 'phone' and value[-6:].isdigit() else \
+                int(value) - 100000 if value.isdigit() else 0
+            return {'Id': id} if data.customer(id) else {'result': 'ERROR'}
+        case 'customer', 'get_customers_id':
+            if 'house_id' in params:
+                return {'data': data.house_customers(int(params['house_id']))}
+            return {'data': list(range(1, min(int(params.get('limit', 10)), data.customers) + 1))}
+        case 'customer', 'mark_add':
+            return {'result': '0', 'msg': 'OK'}
+        case 'address', 'get_house':
+            house = data.house(int(params.get('building_id', 0)))
+            return {'data': {str(house['id']): house}} if house else {'result': 'ERROR'}
+        case 'commutation', 'get_data':
+            return {'data': {}}
+        case 'task', 'get_list':
+            if 'customer_id' in params:
+                tasks = [task for customer in _ids(params['customer_id']) for task in data.customer_tasks(customer)]
+            elif 'house_id' in params:
+                tasks = [task for customer in data.house_customers(int(params['house_id']))
+                         for task in data.customer_tasks(customer)]
+            else:
+                tasks = []
+            states, types = _ids(params.get('state_id')), _ids(params.get('type_id'))
+            if states or types:
+                tasks = [
+                    id for id, task in ((id, data.task(id)) for id in tasks)
+                    if (not states or task['state']['id'] in states) and (not types or task['type']['id'] in types)
+                ]
+            count = len(tasks)
+            offset = int(params.get('offset') or 0)
+            tasks = tasks[offset:offset + int(params['limit'])] if params.get('limit') else tasks[offset:]
+            return {'list': ','.join(map(str, tasks)), 'count': count}
+        case 'task', 'show':
+            return _items({id: data.task(id) for id in ids}, ids)
+        case 'task', 'get_comment':
+            task = data.task(int(params.get('id') or params.get('task_id') or 0))
+            return {'data': [
+                {'comment_id': comment['id'], 'date_add': comment['dateAdd'], 'text': comment['comment'],
+                 'employee_id': comment['employee_id']}
+                for comment in (task or {}).get('comments', {}).values()
+            ]}
+        case 'task', 'add' | 'comment_add':
+            return {'result': 'OK', 'Id': data.new_id()}
+        case 'task', 'change_state':
+            return {'result': 'OK'}
+        case 'attach', 'get':
+            return {'data': data.attachs(params.get('object_type', ''), int(params.get('object_id', 0)))}
+        case 'attach', 'get_file_temporary_link':
+            return {'data': f'http://127.0.0.1/attach/{params.get("uuid")}'}
+    return {'result': 'ERROR', 'error': f'unknown action {cat} {action}'}
+
+
+def create_app(data: Dataset, latency: float = 0, jitter: float = 0, error_rate: float = 0,
+               slow: dict[tuple[str, str], float] | None = None, seed: int = 1) -> FastAPI:
+    """Build fake UserSide app
+
+    Args:
+        data: dataset to serve
+        latency: base delay of every call (s)
+        jitter: max random delay added to latency (s)
+        error_rate: share of calls answered with HTTP 500
+        slow: (cat, action) -> delay used instead of latency
+        seed: seed of latency/error randomness
+    """
+    app = FastAPI(title='Fake UserSide')
+    rnd = Random(seed)
+    calls: Counter = Counter()
+    errors: Counter = Counter()
+
+    @app.get('/api.php')
+    async def api(request: Request):
+        params = dict(request.query_params)
+        cat, action = params.pop('cat', ''), params.pop('action', '')
+        calls[f'{cat} {action}'] += 1
+        delay = (slow or {}).get((cat, action), latency) + rnd.uniform(0, jitter)
+        if delay:
+            await sleep(delay)
+        if rnd.random() < error_rate:
+            errors[f'{cat} {action}'] += 1
+            return JSONResponse({'result': 'ERROR', 'error': 'simulated failure'}, 500)
+        return handle(data, cat, action, params)
+
+    @app.get('/_stats')
+    async def stats():
+        return {'calls': dict(calls), 'errors': dict(errors), 'total': sum(calls.values())}
+
+    @app.post('/_stats/reset')
+    async def reset_stats():
+        calls.clear()
+        errors.clear()
+        return {'status': 'success'}
+
+    @app.get('/_info')
+    async def info():
+        return {'customers': data.customers, 'houses': data.houses, 'employees': EMPLOYEES}
+
+    return app
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--customers', type=int, default=CUSTOMERS, help='dataset size')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.05, help='base delay of every call (s)')
+    parser.add_argument('--jitter', type=float, default=0.02, help='max random delay added to latency (s)')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of calls answered with HTTP 500')
+    parser.add_argument('--slow', action='append', default=[], metavar='CAT:ACTION=SECONDS',
+                        help='delay for one action, e.g. device:get_ont_data=0.5 (repeatable)')
+    args = parser.parse_args()
+
+    slow = {}
+    for item in args.slow:
+        name, delay = item.split('=')
+        slow[tuple(name.split(':'))] = float(delay)
+    app = create_app(Dataset(args.customers, args.seed), args.latency, args.jitter, args.error_rate, slow, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
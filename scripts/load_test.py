@@ -0,0 +1,126 @@
+"""SmartLinkAPI load test
+
+Replays /customer, /box, /task and /neomobile traffic against running SmartLinkAPI (configured to use
+scripts/fake_userside.py) and reports latency percentiles, throughput and UserSide calls per request.
+Every scenario runs as separate phase, so UserSide calls can be attributed to it; `mix` phase runs
+all scenarios together by weight.
+
+Usage (from repo root):
+    python scripts/fake_userside.py &
+    uvicorn main:app --port 8000 &
+    python scripts/load_test.py --apikey KEY [--requests 300] [--concurrency 20] [--phases customer,box,mix]
+"""
+from argparse import ArgumentParser
+from asyncio import Semaphore, gather, run
+from collections import Counter
+from collections.abc import Callable
+from random import Random
+from time import perf_counter
+
+import httpx
+
+API = 'http://127.0.0.1:8000'
+USERSIDE = 'http://127.0.0.1:8099'
+REQUESTS = 300 # requests per phase
+CONCURRENCY = 20
+TIMEOUT = 60
+
+SCENARIOS: dict[str, tuple[int, Callable[[Random, dict], str]]] = { # name -> (weight in mix, url builder)
+    'customer': (4, lambda rnd, info: f'/customer/{rnd.randint(1, info["customers"])}'),
+    'customer_search': (2, lambda rnd, info: f'/customer/search?query={100000 + rnd.randint(1, info["customers"])}'),
+    'box': (1, lambda rnd, info: f'/box/{rnd.randint(1, info["houses"])}?get_tasks=true&get_onu_level=true'),
+    'task': (3, lambda rnd, info: f'/task?customer_id={rnd.randint(1, info["customers"])}'),
+    'neomobile_customer': (2, lambda rnd, info: f'/neomobile/customer?id={rnd.randint(1, info["customers"])}'),
+    'neomobile_documents': (1, lambda rnd, info: f'/neomobile/documents?id={rnd.randint(1, info["customers"])}')
+}
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, max(0, round(percent / 100 * len(values) + 0.5) - 1))]
+
+async def run_phase(client: httpx.AsyncClient, urls: list[tuple[str, str]], concurrency: int) -> tuple[dict, float]:
+    """Request urls with `concurrency` requests in flight
+
+    Returns:
+        {scenario: {'latencies': [...], 'errors': n}}, phase duration
+    """
+    semaphore = Semaphore(concurrency)
+    results: dict[str, dict] = {}
+
+    async def request(name: str, url: str):
+        async with semaphore:
+            started = perf_counter()
+            try:
+                response = await client.get(url)
+                failed = response.status_code >= 400 and response.status_code != 404
+            except httpx.HTTPError:
+                failed = True
+            result = results.setdefault(name, {'latencies': [], 'errors': 0})
+            result['latencies'].append(perf_counter() - started)
+            result['errors'] += failed
+
+    started = perf_counter()
+    await gather(*[request(name, url) for name, url in urls])
+    return results, perf_counter() - started
+
+async def userside_calls(client: httpx.AsyncClient, reset: bool = False) -> Counter:
+    """Get fake UserSide call counters (and reset them)"""
+    calls = Counter((await client.get('/_stats')).json()['calls'])
+    if reset:
+        await client.post('/_stats/reset')
+    return calls
+
+def report(phase: str, results: dict, duration: float, calls: Counter):
+    total = sum(len(result['latencies']) for result in results.values())
+    print(f'\n== {phase}: {total} requests in {duration:.2f}s, {total / duration:.1f} req/s, '
+          f'{sum(calls.values())} UserSide calls ({sum(calls.values()) / max(total, 1):.1f}/request)')
+    print(f'{"scenario":<22} {"count":>6} {"errors":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8}')
+    for name, result in results.items():
+        latencies = sorted(result['latencies'])
+        print(f'{name:<22} {len(latencies):>6} {result["errors"]:>6} {percentile(latencies, 50) * 1000:>8.1f} '
+              f'{percentile(latencies, 95) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} '
+              f'{latencies[-1] * 1000:>8.1f}')
+    if len(results) == 1:
+        for action, count in calls.most_common():
+            print(f'    {action:<40} {count / max(total, 1):>6.2f}/request')
+
+async def main_async(args):
+    rnd = Random(args.seed)
+    async with httpx.AsyncClient(base_url=args.userside, timeout=TIMEOUT) as userside, \
+        httpx.AsyncClient(base_url=args.api, timeout=TIMEOUT,
+                          limits=httpx.Limits(max_connections=args.concurrency)) as api:
+        info = (await userside.get('/_info')).json()
+        for phase in args.phases:
+            if phase == 'mix':
+                names = rnd.choices(list(SCENARIOS), [weight for weight, _ in SCENARIOS.values()], k=args.requests)
+            else:
+                names = [phase] * args.requests
+            urls = [(name, SCENARIOS[name][1](rnd, info)) for name in names]
+            urls = [(name, f'{url}{"&" if "?" in url else "?"}apikey={args.apikey}') for name, url in urls]
+            await userside_calls(userside, reset=True)
+            results, duration = await run_phase(api, urls, args.concurrency)
+            report(phase, results, duration, await userside_calls(userside))
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--api', default=API, help='SmartLinkAPI base url')
+    parser.add_argument('--apikey', required=True, help='SmartLinkAPI key (API_KEY from config.py)')
+    parser.add_argument('--userside', default=USERSIDE, help='fake UserSide base url')
+    parser.add_argument('--requests', type=int, default=REQUESTS, help='requests per phase')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--phases', default=','.join([*SCENARIOS, 'mix']),
+                        help=f'comma-separated phases: {", ".join(SCENARIOS)}, mix')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    args.phases = [phase.strip() for phase in args.phases.split(',') if phase.strip()]
+    unknown = [phase for phase in args.phases if phase != 'mix' and phase not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown phases: {", ".join(unknown)}')
+    run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 """Simple utils like parse agreement or build 2 gis link"""
 from datetime import datetime as dt
 from functools import reduce
+from ipaddress import IPv4Address
 
 from urllib.parse import urljoin
 
@@ -101,6 +102,19 @@ def str_to_list(data: str) -> list:
     """
     return [item.strip() for item in data.split(",") if item.strip()]
 
+def chunks(data: list, size: int) -> list[list]:
+    """
+    Split a list into consecutive parts of at most `size` items.
+
+    Args:
+        data (list): List to split.
+        size (int): Max part size.
+
+    Returns:
+        list[list]: List parts.
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
 def to_neo_link(lat: float, lon: float) -> str:
     """
     Build a NeoTelecom map link from latitude and longitude.
@@ -184,6 +198,23 @@ def format_mac(mac: str | None) -> str | None:
         return
     return ':'.join(mac.replace('-', '')[i:i + 2] for i in range(0, len(mac.replace('-', '')), 2))
 
+def get_customer_ip(customer: dict) -> str | None:
+    """
+    Get first IP address of customer
+
+    Args:
+        customer (dict): UserSide customer data
+
+    Returns:
+        str | None: IP address (UserSide stores it as integer)
+    """
+    ip_mac = customer.get('ip_mac') or {}
+    addresses = list(ip_mac.values() if isinstance(ip_mac, dict) else ip_mac) # UserSide sends [] instead of {}
+    ip = addresses[0].get('ip') if addresses and isinstance(addresses[0], dict) else None
+    if not ip:
+        return None
+    return str(IPv4Address(int(ip)))
+
 def get_coordinates(polygon: list[list[float]] | None) -> list[float] | None:
     if polygon is None:
         return None